@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from django.utils import timezone
 
-from blog.models import Category, Post, Location
+from blog.models import Category, Job, Post, Location
+from blog.search import filter_admin_queryset
 
 
 admin.site.site_title = 'Администрирование блога'
@@ -35,3 +39,30 @@ class PostAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
         }),
     )
+
+    def get_search_results(self, request: HttpRequest, queryset: QuerySet,
+                           search_term: str) -> tuple[QuerySet, bool]:
+        '''Ищет по полнотекстовому индексу вместо LIKE по search_fields.
+        '''
+        return filter_admin_queryset(queryset, search_term), False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'status', 'attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['task', 'key']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['locked_by', 'locked_until', 'last_error',
+                       'created_at', 'finished_at']
+    actions = ['retry']
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request: HttpRequest, queryset: QuerySet) -> None:
+        '''Возвращает не выполненные задачи в очередь с новыми
+        попытками.
+        '''
+        queryset.filter(status=Job.Status.FAILED).update(
+            status=Job.Status.PENDING, attempts=0, run_at=timezone.now(),
+            finished_at=None,
+        )
@@ -0,0 +1,167 @@
+import asyncio
+from functools import partial
+from typing import Any, Callable
+
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.core.paginator import EmptyPage
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.views.generic import View
+
+from blog.concurrency import gather_sync, run_sync
+from blog.forms import CommentForm
+from blog.mixins import (PAGINATION_CURSOR, FeedPaginationMixin,
+                         dispatch_post_detail, get_post_etag,
+                         get_post_not_modified, set_post_etag)
+from blog.models import Post
+from blog.paginators import CachedCountPaginator
+from blog.routers import read_from_replica
+from blog.services import (PostVersion, get_comments_chunk, get_posts,
+                           get_posts_username, get_published_category,
+                           queryset_annotate)
+from blog.views import (AMOUNT_COMMENTS_ON_ONE_PAGE, AMOUNT_OBJ_ON_ONE_PAGE,
+                        get_comments_more_url)
+
+
+def requested_page_number(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 1
+
+
+class AsyncView(View):
+    '''Асинхронное представление только для чтения. Запросы к БД
+    и отрисовка шаблона выполняются в пуле blog.concurrency, чтения,
+    как у ReplicaReadMixin, идут с реплики.
+    '''
+
+    @classmethod
+    def as_view(cls, **initkwargs) -> Callable:
+        view = super().as_view(**initkwargs)
+        # Django 3.2 узнаёт асинхронное представление только по
+        # пометке на функции, которую возвращает as_view().
+        view._is_coroutine = asyncio.coroutines._is_coroutine
+        return view
+
+    async def dispatch(self, request: HttpRequest, *args,
+                       **kwargs) -> HttpResponse:
+        if request.method not in ('GET', 'HEAD'):
+            return self.http_method_not_allowed(request, *args, **kwargs)
+        # request.user при первом обращении читает сессию и
+        # пользователя из БД, в цикле событий этого делать нельзя.
+        await run_sync(lambda: request.user.is_authenticated)
+        with read_from_replica(request.user):
+            return await self.get(request, *args, **kwargs)
+
+    async def render(self, context: dict) -> HttpResponse:
+        return await run_sync(render, self.request, self.template_name,
+                              context)
+
+
+class AsyncFeedView(FeedPaginationMixin, AsyncView):
+
+    async def get_feed_page(self, objects: QuerySet[Post],
+                            *calls: Callable[[], Any]) -> list:
+        '''Страница ленты и результаты calls, полученные одновременно.
+        При выводе по номерам страница выбирается параллельно с COUNT,
+        поэтому номер за пределами ленты стоит ещё одного запроса.
+        Возвращает - [страница, *результаты calls]
+        '''
+        if self.pagination_mode == PAGINATION_CURSOR:
+            return await gather_sync(
+                partial(self.paginate_feed, objects, AMOUNT_OBJ_ON_ONE_PAGE),
+                *calls,
+            )
+        paginator = CachedCountPaginator(objects, AMOUNT_OBJ_ON_ONE_PAGE,
+                                         count_key=self.get_count_key())
+        number = requested_page_number(self.request.GET.get('page'))
+        rows, _, *results = await gather_sync(
+            partial(self.get_rows, paginator, max(number, 1)),
+            lambda: paginator.count,
+            *calls,
+        )
+        try:
+            paginator.validate_number(number)
+        except EmptyPage:
+            # Как Paginator.get_page(): вместо несуществующей страницы
+            # показывается последняя.
+            number = paginator.num_pages
+            rows = await run_sync(self.get_rows, paginator, number)
+        return [paginator._get_page(rows, number, paginator), *results]
+
+    def get_rows(self, paginator: CachedCountPaginator,
+                 number: int) -> list[Post]:
+        bottom = (number - 1) * paginator.per_page
+        return list(paginator.object_list[bottom:bottom + paginator.per_page])
+
+
+class IndexView(AsyncFeedView):
+    template_name = 'blog/index.html'
+    pagination_mode = PAGINATION_CURSOR
+
+    async def get(self, request: HttpRequest) -> HttpResponse:
+        redirect = self.get_legacy_page_redirect()
+        if redirect is not None:
+            return redirect
+        page, = await self.get_feed_page(queryset_annotate(get_posts()))
+        return await self.render({'page_obj': page})
+
+
+class CategoryPostsView(AsyncFeedView):
+    template_name = 'blog/category.html'
+
+    async def get(self, request: HttpRequest,
+                  category_slug: str) -> HttpResponse:
+        page, category = await self.get_feed_page(
+            queryset_annotate(get_posts()).filter(
+                category__slug=category_slug),
+            partial(get_published_category, category_slug),
+        )
+        return await self.render({'page_obj': page, 'category': category})
+
+
+class ProfileView(AsyncFeedView):
+    template_name = 'blog/profile.html'
+
+    async def get(self, request: HttpRequest, username: str) -> HttpResponse:
+        page, profile = await self.get_feed_page(
+            queryset_annotate(get_posts_username(username)),
+            partial(get_object_or_404, User, username=username),
+        )
+        return await self.render({'page_obj': page, 'profile': profile})
+
+
+class PostDetailView(AsyncView):
+    model = Post
+    template_name = 'blog/detail.html'
+
+    async def get(self, request: HttpRequest, pk: int) -> HttpResponse:
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            response = await run_sync(get_post_not_modified, request, pk)
+            if response is not None:
+                return response
+        post, (comments, has_more) = await gather_sync(
+            partial(dispatch_post_detail, self, request),
+            partial(get_comments_chunk, pk, None,
+                    AMOUNT_COMMENTS_ON_ONE_PAGE),
+        )
+        context = {
+            'post': post,
+            'object': post,
+            'form': CommentForm(),
+            'comments': comments,
+        }
+        if has_more:
+            context['comments_more_url'] = get_comments_more_url(
+                pk, comments[-1]
+            )
+        response = await self.render(context)
+        return set_post_etag(response, get_post_etag(request, PostVersion(
+            post.updated_at, post.thread_version,
+            post.is_published, post.author_id,
+        )))
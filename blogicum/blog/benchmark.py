@@ -0,0 +1,362 @@
+import asyncio
+import io
+import os
+import platform
+import queue
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from statistics import mean, quantiles
+from typing import Callable, NamedTuple, Optional
+from urllib.parse import unquote
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Model
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import Mixer
+
+from blog import urls as blog_urls
+from blog.models import Category, Comment, Location, Post
+from pages import urls as pages_urls
+
+PERCENTILES = (50, 95, 99)
+
+
+class Dataset(NamedTuple):
+    users: int = 20
+    categories: int = 5
+    locations: int = 5
+    posts: int = 200
+    comments: int = 1000
+
+
+class Throughput(NamedTuple):
+    '''Результат нагрузки на один интерфейс сервера.'''
+    interface: str
+    requests: int
+    concurrency: int
+    seconds: float
+    rps: float
+    p50: float
+    p95: float
+    errors: int
+
+
+class Seeded(NamedTuple):
+    '''Объекты, по которым строятся адреса для замера.'''
+    user: Model
+    category: Category
+    post: Post
+    comment: Comment
+
+
+class Measurement(NamedTuple):
+    name: str
+    url: str
+    status: int
+    p50: float
+    p95: float
+    p99: float
+    queries: float
+    rss_kb: int
+
+
+def seed_dataset(dataset: Dataset, seed: int = 0) -> Seeded:
+    '''Наполняет БД синтетическими данными через mixer и Faker:
+    Вход - dataset: сколько объектов каждого вида создать,
+    seed: зерно генераторов, одинаковое зерно даёт одинаковые данные
+    Возвращает - объекты для адресов: автора самого обсуждаемого
+    поста, его категорию, сам пост и комментарий к нему
+    '''
+    rng = random.Random(seed)
+    # Собственный генератор Faker: общий генератор mixer менять нельзя,
+    # от него зависят тесты и другие вызовы mixer в процессе.
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    mixer = Mixer()
+    now = timezone.now()
+    users = mixer.cycle(dataset.users).blend(
+        get_user_model(),
+        username=(f'{fake.user_name()}_{i}'
+                  for i in range(dataset.users)),
+    )
+    categories = mixer.cycle(dataset.categories).blend(
+        Category,
+        title=fake.sentence,
+        description=fake.paragraph,
+        slug=(f'category-{i}' for i in range(dataset.categories)),
+        is_published=True,
+    )
+    locations = mixer.cycle(dataset.locations).blend(
+        Location, name=fake.city, is_published=True,
+    )
+    posts = mixer.cycle(dataset.posts).blend(
+        Post,
+        title=fake.sentence,
+        text=fake.text,
+        pub_date=(now - timedelta(minutes=rng.randrange(1, 10 ** 6))
+                  for _ in range(dataset.posts)),
+        is_published=True,
+        author=(rng.choice(users) for _ in range(dataset.posts)),
+        category=(rng.choice(categories) for _ in range(dataset.posts)),
+        location=(rng.choice(locations) for _ in range(dataset.posts)),
+        image='',
+    )
+    # Половина комментариев достаётся одному посту, чтобы замерить
+    # и длинное обсуждение, и обычные. Первый из них оставляет автор
+    # поста: от его имени открываются страницы редактирования.
+    post = posts[0]
+    comments = mixer.cycle(dataset.comments).blend(
+        Comment,
+        text=fake.sentence,
+        post=(rng.choice(posts) if i % 2 else post
+              for i in range(dataset.comments)),
+        author=(rng.choice(users) if i else post.author
+                for i in range(dataset.comments)),
+    )
+    return Seeded(post.author, post.category, post, comments[0])
+
+
+def get_url_kwargs(name: str, seeded: Seeded) -> dict:
+    if name == 'blog:edit_profile':
+        return {'pk': seeded.user.pk}
+    return {
+        'pk': seeded.post.pk,
+        'post_id': seeded.post.pk,
+        'comment_id': seeded.comment.pk,
+        'username': seeded.user.username,
+        'category_slug': seeded.category.slug,
+        'feed_format': 'atom',
+    }
+
+
+def collect_urls(seeded: Seeded) -> list[tuple[str, str]]:
+    '''Все именованные адреса blog.urls и pages.urls с аргументами,
+    подставленными из засеянных данных.
+    '''
+    urls = []
+    for module in (blog_urls, pages_urls):
+        for pattern in module.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = f'{module.app_name}:{pattern.name}'
+            kwargs = get_url_kwargs(name, seeded)
+            urls.append((name, reverse(name, kwargs={
+                key: kwargs[key] for key in pattern.pattern.converters
+            })))
+    return urls
+
+
+def get_rss_kb() -> int:
+    '''Текущий размер резидентной памяти процесса в КБ; где нет
+    /proc - пиковый размер из getrusage.
+    '''
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure_url(client: Client, name: str, url: str,
+                requests: int, warmup: int = 1) -> Measurement:
+    '''Запрашивает адрес requests раз после warmup прогревочных
+    запросов и возвращает перцентили времени ответа в миллисекундах
+    и среднее число SQL-запросов.
+    '''
+    for _ in range(warmup):
+        client.get(url)
+    samples = []
+    query_counts = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            samples.append((time.perf_counter() - started) * 1000)
+        query_counts.append(len(queries))
+    cuts = quantiles(samples, n=100, method='inclusive')
+    p50, p95, p99 = (cuts[percentile - 1] for percentile in PERCENTILES)
+    return Measurement(name, url, response.status_code, p50, p95, p99,
+                       mean(query_counts), get_rss_kb())
+
+
+def get_environment() -> dict:
+    '''Сведения, без которых результаты разных прогонов нельзя
+    сравнивать: коммит, версии и БД.
+    '''
+    try:
+        commit = subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def compare(current: list[dict], baseline: list[dict]
+            ) -> list[tuple[str, Optional[float], Optional[float]]]:
+    '''Изменение p50 (в процентах) и числа запросов по каждому адресу
+    относительно сохранённого прогона.
+    '''
+    previous = {item['name']: item for item in baseline}
+    rows = []
+    for item in current:
+        old = previous.get(item['name'])
+        if old is None:
+            rows.append((item['name'], None, None))
+            continue
+        rows.append((
+            item['name'],
+            (item['p50'] / max(old['p50'], 1e-6) - 1) * 100,
+            item['queries'] - old['queries'],
+        ))
+    return rows
+
+
+def _throughput(interface: str, results: list[tuple[float, bool]],
+                concurrency: int, seconds: float) -> Throughput:
+    samples = [elapsed * 1000 for elapsed, _ in results]
+    cuts = quantiles(samples, n=100, method='inclusive')
+    return Throughput(
+        interface, len(results), concurrency, seconds,
+        len(results) / seconds, cuts[49], cuts[94],
+        sum(1 for _, ok in results if not ok),
+    )
+
+
+def _jobs(urls: list[str], requests: int) -> list[str]:
+    return [urls[number % len(urls)] for number in range(requests)]
+
+
+def drive_wsgi(application: Callable, urls: list[str], requests: int,
+               concurrency: int, threads: int,
+               cookies: str = '') -> Throughput:
+    '''Нагружает WSGI-приложение как многопоточный сервер:
+    Вход - urls: адреса по кругу, requests: всего запросов,
+    concurrency: клиентов, каждый ждёт ответа перед следующим
+    запросом, threads: рабочих потоков сервера (gunicorn --threads),
+    cookies: заголовок Cookie
+    Возвращает - Throughput; время ответа включает ожидание потока
+    '''
+    pending = queue.SimpleQueue()
+    for url in _jobs(urls, requests):
+        pending.put(url)
+
+    def handle(url: str) -> bool:
+        path, _, query = url.partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            # PATH_INFO по PEP 3333 - байты UTF-8, прочитанные как latin-1.
+            'PATH_INFO': unquote(path).encode().decode('iso-8859-1'),
+            'QUERY_STRING': query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'HTTP_COOKIE': cookies,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        statuses = []
+        body = application(environ, lambda status, headers,
+                           exc_info=None: statuses.append(status))
+        try:
+            for _ in body:
+                pass
+        finally:
+            body.close()
+        return statuses[0].startswith('200')
+
+    def client(server: ThreadPoolExecutor) -> list[tuple[float, bool]]:
+        results = []
+        while True:
+            try:
+                url = pending.get_nowait()
+            except queue.Empty:
+                return results
+            started = time.perf_counter()
+            # Очередь пула, как и очередь сервера, обслуживается по
+            # порядку поступления.
+            ok = server.submit(handle, url).result()
+            results.append((time.perf_counter() - started, ok))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as server, \
+            ThreadPoolExecutor(max_workers=concurrency) as clients:
+        futures = [clients.submit(client, server)
+                   for _ in range(concurrency)]
+        results = [result for future in futures for result in future.result()]
+    return _throughput('wsgi', results, concurrency,
+                       time.perf_counter() - started)
+
+
+async def drive_asgi(application: Callable, urls: list[str], requests: int,
+                     concurrency: int, cookies: str = '') -> Throughput:
+    '''Нагружает ASGI-приложение теми же клиентами, что drive_wsgi:
+    concurrency задач в одном цикле событий, каждая ждёт ответа
+    перед следующим запросом.
+    '''
+    pending = iter(_jobs(urls, requests))
+
+    async def receive() -> dict:
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def request(url: str) -> tuple[float, bool]:
+        path, _, query = url.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': unquote(path),
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'localhost'),
+                        (b'cookie', cookies.encode())],
+            'server': ('localhost', 80),
+        }
+        messages = []
+
+        async def send(message: dict) -> None:
+            messages.append(message)
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        return time.perf_counter() - started, messages[0]['status'] == 200
+
+    async def client() -> list[tuple[float, bool]]:
+        return [await request(url) for url in pending]
+
+    started = time.perf_counter()
+    batches = await asyncio.gather(*(client() for _ in range(concurrency)))
+    return _throughput('asgi', [result for batch in batches
+                                for result in batch],
+                       concurrency, time.perf_counter() - started)
@@ -0,0 +1,23 @@
+from django.core.cache import cache
+
+
+def get_generation(name: str) -> int:
+    '''Текущее поколение группы записей кеша. Поколение входит в
+    ключи записей, поэтому его увеличение сбрасывает всю группу.
+    '''
+    key = f'blog:generation:{name}'
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 1, timeout=None)
+        generation = cache.get(key, 1)
+    return generation
+
+
+def bump_generation(name: str) -> None:
+    '''Сбрасывает группу записей кеша, увеличивая её поколение.
+    '''
+    key = f'blog:generation:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULT_PUBLICATION_BUCKET = 30
+
+
+def get_publication_bucket() -> int:
+    '''Размер интервала (в секундах), до которого округляется
+    текущее время при отборе опубликованных постов.
+    '''
+    return getattr(settings, 'BLOG_PUBLICATION_BUCKET',
+                   DEFAULT_PUBLICATION_BUCKET)
+
+
+def publication_now() -> datetime:
+    '''Часы публикации:
+    Вход - None
+    Возвращает - текущее время, округлённое вниз до границы интервала.
+    Все запросы ленты внутри одного интервала используют одинаковую
+    отсечку, поэтому их результаты и ключи кеша совпадают, а
+    отложенные публикации появляются не позже чем через один интервал.
+    '''
+    now = timezone.now()
+    bucket = get_publication_bucket()
+    if bucket <= 0:
+        return now
+    timestamp = int(now.timestamp())
+    return now.replace(microsecond=0) - timedelta(seconds=timestamp % bucket)
+
+
+def next_publication_tick() -> datetime:
+    '''Момент, когда часы публикации перейдут к следующему интервалу.
+    '''
+    bucket = get_publication_bucket()
+    if bucket <= 0:
+        return timezone.now()
+    return publication_now() + timedelta(seconds=bucket)
+
+
+def publication_visible_at(pub_date: datetime) -> datetime:
+    '''Момент, когда пост с датой pub_date появится в лентах:
+    первая граница интервала часов публикации не раньше pub_date.
+    '''
+    bucket = get_publication_bucket()
+    if bucket <= 0:
+        return pub_date
+    remainder = int(pub_date.timestamp()) % bucket
+    if remainder == 0 and pub_date.microsecond == 0:
+        return pub_date
+    return (pub_date.replace(microsecond=0)
+            + timedelta(seconds=bucket - remainder))
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+DEFAULT_QUERY_WORKERS = 8
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_query_executor() -> ThreadPoolExecutor:
+    '''Общий пул из BLOG_ASYNC_QUERY_WORKERS потоков для синхронного
+    кода асинхронных представлений. Размер пула ограничивает число
+    одновременных запросов к БД: у каждого потока своё подключение.
+    При BLOG_ASYNC_QUERY_WORKERS = 0 пул не используется.
+    '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BLOG_ASYNC_QUERY_WORKERS',
+                                    DEFAULT_QUERY_WORKERS),
+                thread_name_prefix='blog-query',
+            )
+    return _executor
+
+
+def _call(func: Callable, *args, **kwargs) -> Any:
+    # Потоки пула не получают сигналов начала и конца запроса, поэтому
+    # устаревшие и сломанные подключения закрываются здесь.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func: Callable, *args, **kwargs) -> Any:
+    '''Выполняет синхронную функцию (запрос к БД, отрисовку шаблона)
+    в пуле get_query_executor(), не занимая цикл событий.
+    Контекстные переменные (реплика для чтения, замер запроса)
+    переходят в поток пула.
+    '''
+    if not getattr(settings, 'BLOG_ASYNC_QUERY_WORKERS',
+                   DEFAULT_QUERY_WORKERS):
+        # Без пула всё выполняется по очереди в потоке запроса, как
+        # у синхронных представлений (и в одной транзакции с ним).
+        return await sync_to_async(func)(*args, **kwargs)
+    return await sync_to_async(
+        _call, thread_sensitive=False, executor=get_query_executor(),
+    )(func, *args, **kwargs)
+
+
+async def gather_sync(*calls: Callable[[], Any]) -> list:
+    '''Выполняет независимые вызовы одновременно в пуле:
+    Вход - calls: функции без аргументов
+    Возвращает - их результаты в том же порядке; первое исключение
+    пробрасывается, как в asyncio.gather
+    '''
+    return list(await asyncio.gather(*(run_sync(call) for call in calls)))
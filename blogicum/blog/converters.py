@@ -0,0 +1,12 @@
+from blog.feeds import FEED_FORMATS
+
+
+class FeedFormatConverter:
+    '''Формат ленты в адресе: rss или atom.'''
+    regex = '|'.join(FEED_FORMATS)
+
+    def to_python(self, value: str) -> str:
+        return value
+
+    def to_url(self, value: str) -> str:
+        return value
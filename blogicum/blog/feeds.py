@@ -0,0 +1,175 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Max, Model, QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+
+from blog.cache import bump_generation, get_generation
+from blog.models import Category, Post
+from blog.services import (get_posts, get_published_category,
+                           queryset_annotate, timeout_until_publication)
+
+FEED_GENERATION = 'feed'
+FEED_FORMATS = {
+    'rss': Rss201rev2Feed,
+    'atom': Atom1Feed,
+}
+DEFAULT_FEED_ITEMS = 20
+DEFAULT_FEED_CACHE_TIMEOUT = 60 * 60
+
+
+class FeedState(NamedTuple):
+    '''Валидаторы ленты: дата самого нового видимого поста и ETag,
+    в который входит и поколение кеша лент, меняющееся при правках.
+    '''
+    newest: Optional[datetime]
+    etag: str
+
+
+def invalidate_feeds() -> None:
+    '''Сбрасывает валидаторы и XML всех лент.'''
+    bump_generation(FEED_GENERATION)
+
+
+def get_feed_cache_timeout() -> int:
+    return getattr(settings, 'BLOG_FEED_CACHE_TIMEOUT',
+                   DEFAULT_FEED_CACHE_TIMEOUT)
+
+
+class PostFeed(Feed):
+    '''Лента последних опубликованных постов в формате RSS или Atom.
+    Видимость постов та же, что в get_posts().
+    '''
+
+    def __init__(self, feed_format: str) -> None:
+        super().__init__()
+        self.feed_type = FEED_FORMATS[feed_format]
+
+    def get_object(self, request: HttpRequest, **kwargs) -> Optional[Model]:
+        return None
+
+    def get_posts(self, obj: Optional[Model]) -> QuerySet[Post]:
+        return get_posts()
+
+    def items(self, obj: Optional[Model]) -> list[Post]:
+        return list(queryset_annotate(self.get_posts(obj))[:getattr(
+            settings, 'BLOG_FEED_ITEMS', DEFAULT_FEED_ITEMS,
+        )])
+
+    def title(self, obj: Optional[Model]) -> str:
+        return 'Блогикум'
+
+    def link(self, obj: Optional[Model]) -> str:
+        return reverse('blog:index')
+
+    def description(self, obj: Optional[Model]) -> str:
+        return 'Новые публикации Блогикума'
+
+    def item_title(self, post: Post) -> str:
+        return post.title
+
+    def item_description(self, post: Post) -> str:
+        return post.text
+
+    def item_link(self, post: Post) -> str:
+        return reverse('blog:post_detail', args=(post.pk,))
+
+    def item_pubdate(self, post: Post) -> datetime:
+        return post.pub_date
+
+    def item_author_name(self, post: Post) -> str:
+        return post.author.get_full_name() or post.author.username
+
+    def item_categories(self, post: Post) -> tuple[str, ...]:
+        return (post.category.title,) if post.category else ()
+
+
+class CategoryFeed(PostFeed):
+
+    def get_object(self, request: HttpRequest,
+                   category_slug: str) -> Category:
+        return get_published_category(category_slug)
+
+    def get_posts(self, category: Category) -> QuerySet[Post]:
+        return get_posts().filter(category=category)
+
+    def title(self, category: Category) -> str:
+        return f'Блогикум: {category.title}'
+
+    def link(self, category: Category) -> str:
+        return reverse('blog:category_posts', args=(category.slug,))
+
+    def description(self, category: Category) -> str:
+        return category.description
+
+
+class AuthorFeed(PostFeed):
+
+    def get_object(self, request: HttpRequest, username: str) -> User:
+        return get_object_or_404(User, username=username)
+
+    def get_posts(self, author: User) -> QuerySet[Post]:
+        return get_posts().filter(author=author)
+
+    def title(self, author: User) -> str:
+        return f'Блогикум: публикации @{author.username}'
+
+    def link(self, author: User) -> str:
+        return reverse('blog:profile', args=(author.username,))
+
+    def description(self, author: User) -> str:
+        return f'Новые публикации пользователя {author.username}'
+
+
+def _state_key(request: HttpRequest) -> str:
+    # Адрес ленты включает её вид, слаг или автора и формат.
+    return (f'blog:feed:{get_generation(FEED_GENERATION)}:'
+            f'{request.path}')
+
+
+def get_feed_state(request: HttpRequest, feed: PostFeed,
+                   **kwargs) -> FeedState:
+    '''Валидаторы ленты из кеша; при промахе - один запрос MAX(pub_date)
+    без выборки самих постов:
+    Вход - feed: лента, kwargs: аргументы адреса (слаг, автор)
+    Возвращает - FeedState, либо вызывает Http404
+    Запись живёт до ближайшей отложенной публикации, правки сбрасывают
+    её через invalidate_feeds().
+    '''
+    key = _state_key(request)
+    state = cache.get(key)
+    if state is None:
+        newest = feed.get_posts(feed.get_object(request, **kwargs)).aggregate(
+            newest=Max('pub_date'),
+        )['newest']
+        state = FeedState(newest, '{}-{}'.format(
+            get_generation(FEED_GENERATION),
+            int(newest.timestamp()) if newest else 0,
+        ))
+        cache.set(key, state, timeout=timeout_until_publication(
+            get_feed_cache_timeout()
+        ))
+    return state
+
+
+def render_feed(request: HttpRequest, feed: PostFeed, state: FeedState,
+                **kwargs) -> HttpResponse:
+    '''Ответ с XML ленты; XML кешируется под ключом с ETag, поэтому
+    новая публикация или правка сразу дают новую запись.
+    '''
+    key = f'{_state_key(request)}:{state.etag}'
+    cached = cache.get(key)
+    if cached is not None:
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+    response = feed(request, **kwargs)
+    cache.set(key, (response.content, response['Content-Type']),
+              timeout=get_feed_cache_timeout())
+    return response
@@ -1,7 +1,12 @@
+from typing import Optional
+
 from django import forms
 from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.uploadedfile import UploadedFile
 
 from blog.models import Post, Comment
+from blog.uploads import BoundedImageField, strip_image_metadata
 
 
 class PostForm(forms.ModelForm):
@@ -11,6 +16,17 @@ class PostForm(forms.ModelForm):
         widgets = {
             'pub_date': forms.DateInput(attrs={'type': 'date'})
         }
+        field_classes = {
+            'image': BoundedImageField,
+        }
+
+    def clean_image(self) -> Optional[File]:
+        # Метаданные убираются до сохранения, чтобы имя файла было хешем
+        # уже очищенного содержимого.
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return strip_image_metadata(image)
+        return image
 
 
 class UserForm(forms.ModelForm):
@@ -0,0 +1,129 @@
+import posixpath
+from io import BytesIO
+from typing import Iterable, NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage, default_storage
+from PIL import Image, ImageOps
+
+DEFAULT_THUMBNAIL_WIDTHS = (320, 640, 1280)
+WEBP = 'WEBP'
+DERIVATIVES_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class Derivative(NamedTuple):
+    name: str
+    width: int
+    format: str
+
+
+class ImageVariants(NamedTuple):
+    width: int
+    derivatives: list[Derivative]
+
+
+def get_thumbnail_widths() -> tuple[int, ...]:
+    return tuple(getattr(settings, 'BLOG_THUMBNAIL_WIDTHS',
+                         DEFAULT_THUMBNAIL_WIDTHS))
+
+
+def get_fallback_format(image: Image.Image) -> str:
+    '''Формат производных для браузеров без WebP: JPEG для
+    непрозрачных изображений, PNG для изображений с прозрачностью.
+    '''
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        return 'PNG'
+    return 'JPEG'
+
+
+def derivative_name(name: str, width: int, image_format: str) -> str:
+    '''Имя производного файла рядом с оригиналом:
+    post_images/photo.jpg -> post_images/photo.w640.webp
+    '''
+    stem, _ = posixpath.splitext(name)
+    extension = 'jpg' if image_format == 'JPEG' else image_format.lower()
+    return f'{stem}.w{width}.{extension}'
+
+
+def plan_derivatives(name: str, original_width: int,
+                     fallback_format: str) -> list[Derivative]:
+    '''Список производных для оригинала: только ширины меньше
+    исходной, для каждой - WebP и запасной формат.
+    '''
+    return [
+        Derivative(derivative_name(name, width, image_format),
+                   width, image_format)
+        for width in get_thumbnail_widths()
+        if width < original_width
+        for image_format in (WEBP, fallback_format)
+    ]
+
+
+def _encode(image: Image.Image, width: int, image_format: str) -> bytes:
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS)
+    if image_format == 'JPEG' and resized.mode != 'RGB':
+        resized = resized.convert('RGB')
+    buffer = BytesIO()
+    options = {'optimize': True}
+    if image_format in ('JPEG', WEBP):
+        options['quality'] = 80
+    resized.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name: str,
+                         storage: Storage = default_storage
+                         ) -> ImageVariants:
+    '''Создаёт недостающие уменьшенные копии изображения поста:
+    Вход - name: имя файла в хранилище
+    Возвращает - ширину оригинала и список всех его производных
+    '''
+    with storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert(
+                'RGBA' if 'transparency' in image.info else 'RGB'
+            )
+        derivatives = plan_derivatives(name, image.width,
+                                       get_fallback_format(image))
+        for derivative in derivatives:
+            if not storage.exists(derivative.name):
+                storage.save(derivative.name, ContentFile(
+                    _encode(image, derivative.width, derivative.format)
+                ))
+    variants = ImageVariants(image.width, derivatives)
+    cache.set(_derivatives_key(name), variants,
+              timeout=DERIVATIVES_CACHE_TIMEOUT)
+    return variants
+
+
+def get_variants(name: str,
+                 storage: Storage = default_storage) -> ImageVariants:
+    '''Производные изображения; при первом обращении они создаются,
+    затем список берётся из кеша без обращения к хранилищу.
+    '''
+    variants = cache.get(_derivatives_key(name))
+    if variants is None:
+        try:
+            variants = generate_derivatives(name, storage)
+        except (OSError, Image.DecompressionBombError):
+            variants = ImageVariants(0, [])
+    return variants
+
+
+def delete_derivatives(names: Iterable[str],
+                       storage: Storage = default_storage) -> None:
+    '''Удаляет производные файлы перечисленных оригиналов.'''
+    for name in names:
+        for width in get_thumbnail_widths():
+            for image_format in (WEBP, 'JPEG', 'PNG'):
+                storage.delete(derivative_name(name, width, image_format))
+        cache.delete(_derivatives_key(name))
+
+
+def _derivatives_key(name: str) -> str:
+    return f'blog:image_derivatives:{name}'
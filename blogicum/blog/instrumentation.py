@@ -0,0 +1,184 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.backends.django import DjangoTemplates, Template
+from django.http import HttpRequest
+
+from blog.cache import bump_generation, get_generation
+
+METRICS_GENERATION = 'instrumentation'
+METRICS_TIMEOUT = 60 * 60 * 24
+# Суммы времени хранятся в микросекундах: cache.incr работает с целыми.
+METRIC_FIELDS = ('requests', 'sql_count', 'sql_us', 'template_us',
+                 'total_us')
+
+_current: ContextVar[Optional['RequestMetrics']] = ContextVar(
+    'blog_request_metrics', default=None,
+)
+
+
+class RequestMetrics:
+    '''Счётчики одного замеряемого запроса. Запросы асинхронных
+    представлений выполняются в нескольких потоках сразу, поэтому
+    SQL учитывается под блокировкой.
+    '''
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.total_seconds = 0.0
+
+    def add_query(self, seconds: float) -> None:
+        with self.lock:
+            self.sql_count += 1
+            self.sql_seconds += seconds
+
+    def finish(self) -> None:
+        self.total_seconds = time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        '''Значение заголовка Server-Timing, длительности в мс.'''
+        return ', '.join((
+            f'sql;dur={self.sql_seconds * 1000:.1f};'
+            f'desc="{self.sql_count} SQL"',
+            f'tpl;dur={self.template_seconds * 1000:.1f}',
+            f'total;dur={self.total_seconds * 1000:.1f}',
+        ))
+
+
+def track_query(execute: Callable, sql: str, params: Any, many: bool,
+                context: dict) -> Any:
+    '''execute_wrapper, который blog.signals.instrument_connection
+    ставит на каждое подключение: учитывает запрос в замере текущего
+    контекста. Контекст переходит в потоки sync_to_async, поэтому
+    учитываются и запросы, выполненные не в потоке запроса.
+    '''
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(time.perf_counter() - started)
+
+
+class measure_request:
+    '''Контекст замера запроса: делает счётчики доступными
+    track_query и шаблонному движку.
+    '''
+
+    def __enter__(self) -> RequestMetrics:
+        self.metrics = RequestMetrics()
+        self.token = _current.set(self.metrics)
+        return self.metrics
+
+    def __exit__(self, *exc_info) -> None:
+        _current.reset(self.token)
+        self.metrics.finish()
+
+
+class InstrumentedTemplate(Template):
+
+    def render(self, context: Optional[dict] = None,
+               request: Optional[HttpRequest] = None) -> str:
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    '''Шаблонный движок Django, который во время замеряемого запроса
+    учитывает время отрисовки шаблонов верхнего уровня (вложенные
+    include и extends входят в него и не считаются повторно).
+    '''
+
+    def from_string(self, template_code: str) -> InstrumentedTemplate:
+        return InstrumentedTemplate(
+            self.engine.from_string(template_code), self,
+        )
+
+    def get_template(self, template_name: str) -> InstrumentedTemplate:
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+def _metric_key(view_name: str, field: str) -> str:
+    return (f'blog:metrics:{get_generation(METRICS_GENERATION)}:'
+            f'{view_name}:{field}')
+
+
+def _views_key() -> str:
+    return f'blog:metrics:{get_generation(METRICS_GENERATION)}:views'
+
+
+def _incr(key: str, delta: int) -> None:
+    if not cache.add(key, delta, timeout=METRICS_TIMEOUT):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, timeout=METRICS_TIMEOUT)
+
+
+def record(view_name: str, metrics: RequestMetrics) -> None:
+    '''Добавляет замер запроса к суммам его представления в кеше.
+    Суммы общие для всех процессов, если кеш общий (Redis,
+    Memcached); с LocMemCache каждый процесс копит свои.
+    '''
+    views = cache.get(_views_key(), set())
+    if view_name not in views:
+        cache.set(_views_key(), views | {view_name},
+                  timeout=METRICS_TIMEOUT)
+    values = {
+        'requests': 1,
+        'sql_count': metrics.sql_count,
+        'sql_us': int(metrics.sql_seconds * 1_000_000),
+        'template_us': int(metrics.template_seconds * 1_000_000),
+        'total_us': int(metrics.total_seconds * 1_000_000),
+    }
+    for field, value in values.items():
+        _incr(_metric_key(view_name, field), value)
+
+
+def get_aggregates() -> dict[str, dict[str, float]]:
+    '''Средние показатели по представлениям:
+    Возвращает - {view_name: {requests, sql_count, sql_ms,
+    template_ms, total_ms}}, всё кроме requests - среднее на запрос
+    '''
+    aggregates = {}
+    for view_name in sorted(cache.get(_views_key(), set())):
+        totals = cache.get_many([_metric_key(view_name, field)
+                                 for field in METRIC_FIELDS])
+        totals = {field: totals.get(_metric_key(view_name, field), 0)
+                  for field in METRIC_FIELDS}
+        requests = totals['requests']
+        if not requests:
+            continue
+        aggregates[view_name] = {
+            'requests': requests,
+            'sql_count': totals['sql_count'] / requests,
+            'sql_ms': totals['sql_us'] / requests / 1000,
+            'template_ms': totals['template_us'] / requests / 1000,
+            'total_ms': totals['total_us'] / requests / 1000,
+        }
+    return aggregates
+
+
+def reset_aggregates() -> None:
+    bump_generation(METRICS_GENERATION)
+
+
+def get_sample_rate() -> float:
+    return float(getattr(settings, 'BLOG_INSTRUMENTATION_SAMPLE_RATE', 0))
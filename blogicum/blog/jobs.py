@@ -0,0 +1,180 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from blog.models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_LEASE = 5 * 60
+DEFAULT_JOB_RETENTION = 60 * 60 * 24 * 7
+CLAIM_CANDIDATES = 10
+
+_tasks: dict[str, Callable] = {}
+
+
+def get_job_lease() -> int:
+    return getattr(settings, 'BLOG_JOB_LEASE', DEFAULT_JOB_LEASE)
+
+
+def get_job_retention() -> int:
+    return getattr(settings, 'BLOG_JOB_RETENTION', DEFAULT_JOB_RETENTION)
+
+
+def task(max_attempts: int = 3, retry_delay: int = 30) -> Callable:
+    '''Регистрирует функцию как фоновую задачу. Аргументы задачи
+    передаются именованными и должны сериализоваться в JSON:
+    Вход - max_attempts: сколько раз пробовать выполнить задачу,
+    retry_delay: пауза (с) перед второй попыткой, дальше она удваивается
+    '''
+    def register(func: Callable) -> Callable:
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        func.retry_delay = retry_delay
+        _tasks[func.task_name] = func
+        return func
+    return register
+
+
+def enqueue(func: Callable, payload: Optional[dict] = None, *,
+            key: str = '', run_at: Optional[datetime] = None) -> None:
+    '''Ставит задачу в очередь после фиксации текущей транзакции: при
+    её откате задача не появится, а вызов из представления или сигнала
+    добавляет к запросу только один INSERT.
+    Вход - func: функция, зарегистрированная через @task,
+    payload: её аргументы, key: ключ идемпотентности - пока задача
+    с этим ключом не завершена, повторная постановка ничего не делает,
+    run_at: время, раньше которого задачу не выполнять
+    '''
+    if getattr(func, 'task_name', None) not in _tasks:
+        raise ValueError(f'{func!r} не зарегистрирована через @task.')
+    job = Job(task=func.task_name, payload=payload or {}, key=key,
+              run_at=run_at or timezone.now(),
+              max_attempts=func.max_attempts)
+    transaction.on_commit(
+        partial(Job.objects.bulk_create, [job], ignore_conflicts=True)
+    )
+
+
+def _claimable(now: datetime) -> Q:
+    # Ожидающие задачи, срок которых подошёл, и задачи, чей
+    # обработчик не уложился в аренду (например, процесс упал).
+    return (Q(status=Job.Status.PENDING, run_at__lte=now)
+            | Q(status=Job.Status.RUNNING, locked_until__lt=now))
+
+
+def claim_job(worker: str) -> Optional[Job]:
+    '''Забирает ближайшую готовую задачу для обработчика worker.
+    Задачу захватывает условный UPDATE: из нескольких процессов,
+    выбравших одну строку, его выполнит только один, остальные
+    переходят к следующей. Работает на любой БД, в том числе на SQLite
+    без SELECT ... FOR UPDATE SKIP LOCKED.
+    Возвращает - задачу, либо None, если готовых задач нет
+    '''
+    now = timezone.now()
+    candidates = list(Job.objects.filter(_claimable(now)).order_by(
+        'run_at', 'pk',
+    ).values_list('pk', flat=True)[:CLAIM_CANDIDATES])
+    for pk in candidates:
+        claimed = Job.objects.filter(_claimable(now), pk=pk).update(
+            status=Job.Status.RUNNING,
+            locked_by=worker,
+            locked_until=now + timedelta(seconds=get_job_lease()),
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _finish(job: Job, **changes) -> bool:
+    # Если аренда истекла и задачу забрал другой обработчик,
+    # результат этого обработчика уже не записывается.
+    return bool(Job.objects.filter(
+        pk=job.pk, locked_by=job.locked_by,
+    ).update(locked_by='', locked_until=None, **changes))
+
+
+def run_job(job: Job) -> bool:
+    '''Выполняет захваченную задачу и записывает результат. При ошибке
+    задача возвращается в очередь с экспоненциальной паузой, пока
+    не исчерпаны попытки.
+    Возвращает - True, если задача выполнена и результат записан
+    '''
+    func = _tasks.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {job.task} не зарегистрирована.')
+        if job.attempts > job.max_attempts:
+            raise RuntimeError('Попытки исчерпаны: обработчики не '
+                               'завершили задачу за время аренды.')
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if func is not None and job.attempts < job.max_attempts:
+            delay = func.retry_delay * 2 ** (job.attempts - 1)
+            logger.warning('Задача %s упала, повтор через %s с:\n%s',
+                           job, delay, error)
+            _finish(job, status=Job.Status.PENDING, last_error=error,
+                    run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            logger.error('Задача %s не выполнена:\n%s', job, error)
+            _finish(job, status=Job.Status.FAILED, last_error=error,
+                    finished_at=timezone.now())
+        return False
+    return _finish(job, status=Job.Status.DONE, finished_at=timezone.now())
+
+
+def purge_finished_jobs() -> int:
+    '''Удаляет выполненные задачи старше BLOG_JOB_RETENTION секунд;
+    не выполненные остаются для разбора.
+    '''
+    deleted, _ = Job.objects.filter(
+        status=Job.Status.DONE,
+        finished_at__lt=timezone.now() - timedelta(
+            seconds=get_job_retention()
+        ),
+    ).delete()
+    return deleted
+
+
+def worker_name() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def work(worker: str, stop: threading.Event, poll_interval: float = 1,
+         burst: bool = False) -> int:
+    '''Цикл обработчика: выполняет задачи, пока не выставлен stop;
+    пустую очередь опрашивает раз в poll_interval секунд.
+    Вход - burst: завершиться, как только очередь опустеет
+    Возвращает - число обработанных задач
+    '''
+    processed = 0
+    purged_at = None
+    while not stop.is_set():
+        close_old_connections()
+        job = claim_job(worker)
+        if job is not None:
+            run_job(job)
+            processed += 1
+            continue
+        if burst:
+            break
+        now = timezone.now()
+        if purged_at is None or now - purged_at > timedelta(hours=1):
+            purge_finished_jobs()
+            purged_at = now
+        stop.wait(poll_interval)
+    close_old_connections()
+    return processed
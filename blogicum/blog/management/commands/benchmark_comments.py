@@ -0,0 +1,141 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from statistics import quantiles
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post
+from blog.services import get_comments_chunk
+
+COMMENTS_ON_PAGE = 50
+
+
+class Worker(threading.Thread):
+    '''Поток, который до остановки повторяет одну операцию и
+    записывает время каждой удачной попытки и число ошибок.
+    '''
+
+    def __init__(self, operation, stop: threading.Event) -> None:
+        super().__init__(daemon=True)
+        self.operation = operation
+        self.stop = stop
+        self.samples = []
+        self.errors = 0
+
+    def run(self) -> None:
+        try:
+            while not self.stop.is_set():
+                started = time.perf_counter()
+                try:
+                    self.operation()
+                except DatabaseError:
+                    self.errors += 1
+                else:
+                    self.samples.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = ('Замеряет пропускную способность при одновременной '
+            'публикации комментариев и чтении обсуждения во временной '
+            'тестовой БД с текущими настройками подключения. Профили '
+            'сравниваются запуском с разными BLOGICUM_DB_*, например '
+            'BLOGICUM_DB_TUNING=0 против настроек по умолчанию.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Потоков, публикующих комментарии.')
+        parser.add_argument('--readers', type=int, default=8,
+                            help='Потоков, читающих обсуждение.')
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Длительность замера в секундах.')
+
+    def handle(self, *args, **options) -> None:
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        directory = tempfile.TemporaryDirectory()
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # Потокам нужен общий файл, а не БД в памяти.
+            test_settings['NAME'] = str(Path(directory.name) / 'bench.db')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True,
+        )
+        try:
+            self.describe_profile()
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            directory.cleanup()
+
+    def describe_profile(self) -> None:
+        profile = [connection.vendor,
+                   f'CONN_MAX_AGE={connection.settings_dict["CONN_MAX_AGE"]}']
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                for pragma in ('journal_mode', 'synchronous', 'mmap_size',
+                               'busy_timeout'):
+                    cursor.execute(f'PRAGMA {pragma}')
+                    profile.append(f'{pragma}={cursor.fetchone()[0]}')
+        self.stdout.write(self.style.MIGRATE_HEADING(', '.join(profile)))
+
+    def run(self, options: dict) -> None:
+        author = get_user_model().objects.create(username='bench_author')
+        post = Post.objects.create(
+            title='Обсуждение', text='Текст', author=author,
+            pub_date=timezone.now(), is_published=True,
+            category=Category.objects.create(title='Категория',
+                                             slug='bench'),
+        )
+
+        def write() -> None:
+            with transaction.atomic():
+                Comment.objects.create(post=post, author=author,
+                                       text='Комментарий')
+
+        def read() -> None:
+            Post.objects.get(pk=post.pk)
+            get_comments_chunk(post.pk, None, COMMENTS_ON_PAGE)
+
+        connection.close()
+        stop = threading.Event()
+        workers = {
+            'запись': [Worker(write, stop)
+                       for _ in range(options['writers'])],
+            'чтение': [Worker(read, stop)
+                       for _ in range(options['readers'])],
+        }
+        for group in workers.values():
+            for worker in group:
+                worker.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for group in workers.values():
+            for worker in group:
+                worker.join()
+        self.stdout.write(
+            f'{"":<10}{"оп/с":>10}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"ошибок":>9}'
+        )
+        for name, group in workers.items():
+            samples = [sample for worker in group
+                       for sample in worker.samples]
+            errors = sum(worker.errors for worker in group)
+            if len(samples) < 2:
+                self.stdout.write(f'{name:<10}{len(samples):>10}'
+                                  f'{"-":>10}{"-":>10}{errors:>9}')
+                continue
+            cuts = quantiles(samples, n=100, method='inclusive')
+            self.stdout.write(
+                f'{name:<10}{len(samples) / options["duration"]:>10.0f}'
+                f'{cuts[49] * 1000:>10.2f}{cuts[94] * 1000:>10.2f}'
+                f'{errors:>9}'
+            )
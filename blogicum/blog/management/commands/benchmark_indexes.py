@@ -0,0 +1,122 @@
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.db.models import Model
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from blog.models import Post
+from blog.seeding import (SeedPlan, rebuild_comment_counts, reset_caches,
+                          seed_blog, sqlite_bulk_load, without_indexes)
+from blog.services import get_comments, get_post_pk_comments
+from blog.services import get_posts, get_posts_author, queryset_annotate
+
+POSTS_ON_PAGE = 10
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает планы (EXPLAIN) и время запросов лент '
+            'без индексов blog и с ними на временной тестовой БД, '
+            'наполненной синтетическими данными. Рабочая БД не '
+            'затрагивается.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=100_000,
+            metavar='POSTS',
+            help=('Сколько создать постов (например, 1000000); '
+                  'на каждый создаётся по комментарию.'),
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Сколько раз выполнять каждый запрос.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options['seed'] < 1:
+            raise SystemExit('Нужен хотя бы один пост.')
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        directory = tempfile.TemporaryDirectory()
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # Миллион постов не стоит держать в памяти.
+            test_settings['NAME'] = str(Path(directory.name) / 'bench.db')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True,
+        )
+        try:
+            self.seed(options['seed'])
+            self.compare(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            directory.cleanup()
+
+    def compare(self, repeat: int) -> None:
+        queries = self.get_queries()
+        with without_indexes():
+            self.stdout.write(self.style.MIGRATE_HEADING('Без индексов'))
+            before = self.measure(queries, repeat)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        self.stdout.write(self.style.MIGRATE_HEADING('С индексами'))
+        after = self.measure(queries, repeat)
+        self.stdout.write(self.style.MIGRATE_HEADING('Итог, мс (медиана)'))
+        for name in queries:
+            self.stdout.write(
+                f'{name:<24}{before[name]:>10.2f}{after[name]:>10.2f}'
+                f'{before[name] / max(after[name], 1e-6):>9.1f}x'
+            )
+
+    def get_queries(self) -> dict:
+        post = Post.objects.order_by('-pk').first()
+        feed = queryset_annotate(get_posts())
+        deep = POSTS_ON_PAGE * 1000
+        return {
+            'index': feed[:POSTS_ON_PAGE],
+            'index_deep_page': feed[deep:deep + POSTS_ON_PAGE],
+            'category': feed.filter(
+                category_id=post.category_id)[:POSTS_ON_PAGE],
+            'profile': queryset_annotate(
+                get_posts_author(post.author))[:POSTS_ON_PAGE],
+            'post_comments': get_post_pk_comments(post.pk),
+            'profile_comments': get_comments(post.author)[:POSTS_ON_PAGE],
+        }
+
+    def measure(self, queries: dict, repeat: int) -> dict:
+        '''Выводит план каждого запроса и возвращает медиану времени
+        выполнения в миллисекундах.
+        '''
+        timings = {}
+        for name, page in queries.items():
+            self.stdout.write(f'-- {name}')
+            self.stdout.write(page.explain())
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(page.all())
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[name] = median(samples)
+            self.stdout.write(f'   {timings[name]:.2f} мс')
+        return timings
+
+    def seed(self, total: int) -> None:
+        '''Наполняет БД синтетическими данными: по комментарию на пост.'''
+        with sqlite_bulk_load():
+            seed_blog(SeedPlan(posts=total, comments=total),
+                      progress=self.progress)
+            rebuild_comment_counts()
+        reset_caches()
+
+    def progress(self, model: type[Model], created: int) -> None:
+        if model is Post:
+            self.stdout.write(f'Создано постов: {created}')
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+
+from blog.benchmark import Dataset, drive_asgi, drive_wsgi, seed_dataset
+
+INTERFACES = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность ленты, категории, профиля '
+            'и страницы поста под WSGI (синхронные представления, '
+            'многопоточный сервер) и под ASGI (blog.async_views) при '
+            'большом числе одновременных клиентов. Каждый интерфейс '
+            'замеряется в отдельном процессе на одной временной БД.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        for field, default in Dataset._field_defaults.items():
+            parser.add_argument(
+                f'--{field}',
+                type=int,
+                default=default,
+                help=f'Сколько создать объектов ({field}).',
+            )
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генераторов данных.')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Сколько запросов на каждый интерфейс.')
+        parser.add_argument('--concurrency', type=int, default=64,
+                            help='Одновременных клиентов.')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Рабочих потоков WSGI-сервера.')
+        parser.add_argument('--serve', choices=INTERFACES,
+                            help='Служебный: замер одного интерфейса.')
+        parser.add_argument('--username',
+                            help='Служебный: от чьего имени запросы.')
+        parser.add_argument('urls', nargs='*',
+                            help='Служебный: адреса для замера.')
+
+    def handle(self, *args, **options) -> None:
+        if options['requests'] < 2:
+            raise SystemExit('Для перцентилей нужно хотя бы 2 запроса.')
+        if options['serve']:
+            self.serve(options)
+            return
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        directory = tempfile.TemporaryDirectory()
+        if connection.vendor == 'sqlite' and not test_settings.get('NAME'):
+            # Процессам-серверам нужен общий файл, а не БД в памяти.
+            test_settings['NAME'] = str(Path(directory.name) / 'bench.db')
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True,
+        )
+        try:
+            self.compare(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            directory.cleanup()
+
+    def compare(self, options: dict) -> None:
+        dataset = Dataset(**{field: options[field]
+                             for field in Dataset._fields})
+        seeded = seed_dataset(dataset, options['seed'])
+        urls = [
+            reverse('blog:index'),
+            reverse('blog:category_posts', args=(seeded.category.slug,)),
+            reverse('blog:profile', args=(seeded.user.username,)),
+            reverse('blog:post_detail', args=(seeded.post.pk,)),
+        ]
+        connection.close()
+        self.stdout.write(
+            f'{"":<6}{"запр/с":>10}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"ошибок":>9}'
+        )
+        for interface in INTERFACES:
+            result = self.run_server(interface, seeded.user.username, urls,
+                                     options)
+            self.stdout.write(
+                f'{interface:<6}{result["rps"]:>10.0f}'
+                f'{result["p50"]:>10.2f}{result["p95"]:>10.2f}'
+                f'{result["errors"]:>9}'
+            )
+
+    def run_server(self, interface: str, username: str, urls: list[str],
+                   options: dict) -> dict:
+        environ = dict(
+            os.environ,
+            BLOGICUM_DB_NAME=str(connection.settings_dict['NAME']),
+            BLOGICUM_ASYNC_VIEWS='1' if interface == 'asgi' else '0',
+        )
+        environ.pop('BLOGICUM_DB_REPLICAS', None)
+        process = subprocess.run(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'),
+             'benchmark_servers', '--serve', interface,
+             '--username', username,
+             '--requests', str(options['requests']),
+             '--concurrency', str(options['concurrency']),
+             '--threads', str(options['threads']),
+             *urls],
+            env=environ, capture_output=True, text=True,
+        )
+        if process.returncode:
+            raise SystemExit(process.stderr)
+        return json.loads(process.stdout.splitlines()[-1])
+
+    def serve(self, options: dict) -> None:
+        middleware = [name for name in settings.MIDDLEWARE
+                      if not name.startswith('debug_toolbar.')]
+        with override_settings(DEBUG=False, MIDDLEWARE=middleware,
+                               BLOG_PAGE_CACHE_VIEWS=[]):
+            cache.clear()
+            client = Client()
+            client.force_login(get_user_model().objects.get(
+                username=options['username']))
+            cookies = '; '.join(f'{morsel.key}={morsel.value}'
+                                for morsel in client.cookies.values())
+            urls = options['urls']
+            if options['serve'] == 'wsgi':
+                handler = WSGIHandler()
+                # Прогрев: шаблоны, подключения потоков, кеш категорий.
+                drive_wsgi(handler, urls, len(urls) * 2,
+                           options['threads'], options['threads'], cookies)
+                result = drive_wsgi(handler, urls, options['requests'],
+                                    options['concurrency'],
+                                    options['threads'], cookies)
+            else:
+                handler = ASGIHandler()
+                asyncio.run(drive_asgi(handler, urls, len(urls) * 2,
+                                       options['threads'], cookies))
+                result = asyncio.run(drive_asgi(
+                    handler, urls, options['requests'],
+                    options['concurrency'], cookies,
+                ))
+        self.stdout.write(json.dumps(result._asdict()))
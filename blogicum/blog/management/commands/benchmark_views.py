@@ -0,0 +1,130 @@
+import json
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from blog.benchmark import (Dataset, collect_urls, compare, get_environment,
+                            measure_url, seed_dataset)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время ответа (p50/p95/p99), число SQL-запросов '
+            'и память по всем адресам blog и pages на синтетических '
+            'данных во временной тестовой БД.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        for field, default in Dataset._field_defaults.items():
+            parser.add_argument(
+                f'--{field}',
+                type=int,
+                default=default,
+                help=f'Сколько создать объектов ({field}).',
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генераторов данных.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Сколько замеряемых запросов на каждый адрес.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Сколько прогревочных запросов перед замером.',
+        )
+        parser.add_argument(
+            '--anonymous',
+            action='store_true',
+            help=('Запрашивать страницы без входа на сайт; по умолчанию '
+                  'запросы идут от автора поста.'),
+        )
+        parser.add_argument(
+            '--output',
+            help='Сохранить результаты в JSON-файл.',
+        )
+        parser.add_argument(
+            '--compare',
+            metavar='BASELINE',
+            help='Сравнить с результатами, сохранёнными через --output.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options['requests'] < 2:
+            raise SystemExit('Для перцентилей нужно хотя бы 2 запроса.')
+        dataset = Dataset(**{field: options[field]
+                             for field in Dataset._fields})
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True,
+        )
+        try:
+            with override_settings(DEBUG=False):
+                results = self.run(dataset, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        report = {
+            'environment': get_environment(),
+            'dataset': dataset._asdict(),
+            'seed': options['seed'],
+            'requests': options['requests'],
+            'anonymous': options['anonymous'],
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['compare']:
+            self.write_comparison(report, options['compare'])
+
+    def run(self, dataset: Dataset, options: dict) -> list[dict]:
+        cache.clear()
+        seeded = seed_dataset(dataset, options['seed'])
+        client = Client(raise_request_exception=False)
+        if not options['anonymous']:
+            client.force_login(seeded.user)
+        self.stdout.write(
+            f'{"адрес":<24}{"код":>5}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"SQL":>7}{"RSS, МБ":>10}'
+        )
+        results = []
+        for name, url in collect_urls(seeded):
+            measurement = measure_url(client, name, url,
+                                      options['requests'],
+                                      options['warmup'])
+            self.stdout.write(
+                f'{name:<24}{measurement.status:>5}'
+                f'{measurement.p50:>9.2f}{measurement.p95:>9.2f}'
+                f'{measurement.p99:>9.2f}{measurement.queries:>7.1f}'
+                f'{measurement.rss_kb / 1024:>10.1f}'
+            )
+            results.append(measurement._asdict())
+        return results
+
+    def write_comparison(self, report: dict, path: str) -> None:
+        with open(path) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline['dataset'] != report['dataset']:
+            self.stderr.write('Внимание: наборы данных прогонов различаются.')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Сравнение с {baseline["environment"]["commit"]}'
+        ))
+        for name, p50_change, queries_change in compare(
+                report['results'], baseline['results']):
+            if p50_change is None:
+                self.stdout.write(f'{name:<24}{"новый адрес":>20}')
+                continue
+            self.stdout.write(
+                f'{name:<24}{p50_change:>+9.1f}% p50'
+                f'{queries_change:>+7.1f} SQL'
+            )
@@ -0,0 +1,45 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connections
+
+from blog.images import generate_derivatives
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Создаёт уменьшенные копии и WebP-версии изображений '
+            'существующих постов в нескольких процессах.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help='Число процессов; по умолчанию - по числу ядер.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        names = sorted(set(Post.objects
+                           .exclude(image='')
+                           .values_list('image', flat=True)))
+        connections.close_all()
+        failed = 0
+        with ProcessPoolExecutor(options['processes']) as executor:
+            futures = {executor.submit(generate_derivatives, name): name
+                       for name in names}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                else:
+                    self.stdout.write(
+                        f'{name}: {len(variants.derivatives)} копий'
+                    )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {len(names) - failed}, '
+            f'ошибок: {failed}'
+        ))
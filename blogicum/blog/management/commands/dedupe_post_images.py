@@ -0,0 +1,98 @@
+import posixpath
+import re
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.utils import timezone
+
+from blog.images import delete_derivatives
+from blog.models import Post
+from blog.seeding import reset_caches
+from blog.storage import file_digest, hashed_name, post_image_storage
+
+DERIVATIVE_RE = re.compile(r'\.w\d+\.\w+$')
+
+
+class Command(BaseCommand):
+    help = ('Переводит изображения постов в хранилище по хешу '
+            'содержимого: одинаковые файлы сливаются в один, ссылки '
+            'постов обновляются, старые копии удаляются.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет сделано.',
+        )
+        parser.add_argument(
+            '--delete-unreferenced',
+            action='store_true',
+            help=('Удалить файлы в каталоге изображений, на которые не '
+                  'ссылается ни один пост.'),
+        )
+
+    def handle(self, *args, **options) -> None:
+        dry_run = options['dry_run']
+        storage = post_image_storage
+        names = set(Post.objects
+                    .exclude(image='')
+                    .values_list('image', flat=True)
+                    .distinct())
+        renamed = freed = 0
+        for name in sorted(names):
+            if not storage.exists(name):
+                self.stderr.write(f'Файл не найден: {name}')
+                continue
+            with storage.open(name, 'rb') as content:
+                target = hashed_name(name, file_digest(content))
+                if target == name:
+                    continue
+                self.stdout.write(f'{name} -> {target}')
+                renamed += 1
+                if storage.exists(target):
+                    freed += storage.size(name)
+                if dry_run:
+                    continue
+                storage.save(name, content)
+            with transaction.atomic():
+                # update() обходит сигналы: updated_at нужен для ETag
+                # страниц постов, остальные кеши сбрасываются ниже.
+                Post.objects.filter(image=name).update(
+                    image=target, updated_at=timezone.now(),
+                )
+            storage.delete(name)
+            delete_derivatives([name])
+        if options['delete_unreferenced']:
+            freed += self.delete_unreferenced(names, dry_run)
+        if renamed and not dry_run:
+            # Карточки, страницы и ленты ещё ссылаются на старые файлы.
+            reset_caches()
+        self.stdout.write(self.style.SUCCESS(
+            f'Переименовано файлов: {renamed}, освобождено байт: {freed}'
+            f'{" (пробный запуск)" if dry_run else ""}'
+        ))
+
+    def delete_unreferenced(self, names: set, dry_run: bool) -> int:
+        '''Удаляет оригиналы, на которые не ссылается ни один пост,
+        вместе с их уменьшенными копиями.
+        '''
+        storage = post_image_storage
+        directories = {posixpath.dirname(name) for name in names}
+        directories.add(Post._meta.get_field('image').upload_to)
+        referenced = set(Post.objects
+                         .exclude(image='')
+                         .values_list('image', flat=True))
+        freed = 0
+        for directory in sorted(directories):
+            if not storage.exists(directory):
+                continue
+            for filename in storage.listdir(directory)[1]:
+                name = posixpath.join(directory, filename)
+                if name in referenced or DERIVATIVE_RE.search(filename):
+                    continue
+                self.stdout.write(f'Не используется: {name}')
+                freed += storage.size(name)
+                if not dry_run:
+                    storage.delete(name)
+                    delete_derivatives([name])
+        return freed
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = ('Заново строит полнотекстовый индекс постов, например после '
+            'загрузки данных в обход сигналов.')
+
+    def handle(self, *args, **options) -> None:
+        if connection.vendor != 'sqlite':
+            self.stdout.write('Индекс FTS5 используется только с SQLite, '
+                              'перестраивать нечего.')
+            return
+        with transaction.atomic():
+            indexed = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {indexed}'
+        ))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import Count
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает денормализованный счётчик Post.comment_count '
+            'пачками и исправляет расхождения.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество постов, обрабатываемых за одну транзакцию.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только сообщить о расхождениях, не изменяя данные.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        last_pk = 0
+        checked = fixed = 0
+        while True:
+            batch = list(Post.objects
+                         .filter(pk__gt=last_pk)
+                         .order_by('pk')
+                         .only('pk', 'comment_count')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            fixed += self.reconcile(batch, dry_run)
+            checked += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено постов: {checked}, '
+            f'{"найдено" if dry_run else "исправлено"} расхождений: {fixed}'
+        ))
+
+    def reconcile(self, batch: list[Post], dry_run: bool) -> int:
+        '''Сверяет счётчики пачки постов с реальным числом комментариев.
+        Возвращает количество постов с неверным счётчиком.
+        '''
+        actual = dict(Comment.objects
+                      .filter(post_id__in=[post.pk for post in batch])
+                      .order_by()
+                      .values_list('post_id')
+                      .annotate(total=Count('id')))
+        stale = []
+        for post in batch:
+            total = actual.get(post.pk, 0)
+            if post.comment_count != total:
+                post.comment_count = total
+                stale.append(post)
+        if stale and not dry_run:
+            with transaction.atomic():
+                Post.objects.bulk_update(stale, ['comment_count'])
+        return len(stale)
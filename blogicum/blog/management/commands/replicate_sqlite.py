@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import DEFAULT_DB_ALIAS
+
+from blog.routers import get_replicas
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную БД SQLite в файлы реплик через '
+            'backup API. Заменяет настоящую репликацию при локальной '
+            'проверке маршрутизации чтений.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help=('Повторять копирование с этим интервалом в секундах; '
+                  'по умолчанию - один раз.'),
+        )
+
+    def handle(self, *args, **options) -> None:
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise SystemExit('Команда работает только с SQLite.')
+        replicas = get_replicas()
+        if not replicas:
+            raise SystemExit('Реплики не настроены: задайте '
+                             'BLOGICUM_DB_REPLICAS.')
+        while True:
+            started = time.perf_counter()
+            for alias in replicas:
+                self.copy(primary['NAME'], settings.DATABASES[alias]['NAME'])
+            self.stdout.write(
+                f'Реплики обновлены за '
+                f'{(time.perf_counter() - started) * 1000:.0f} мс'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source_name: str, target_name: str) -> None:
+        '''Согласованный снимок основной БД даже во время записи.'''
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(target_name)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
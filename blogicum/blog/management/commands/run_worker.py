@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from blog.jobs import work, worker_name
+
+
+class Command(BaseCommand):
+    help = ('Выполняет фоновые задачи из очереди blog.jobs. Можно '
+            'запускать несколько обработчиков одновременно, в том '
+            'числе на разных машинах с общей БД. SIGINT и SIGTERM '
+            'завершают обработчик после текущей задачи.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1,
+            help='Пауза (с) между опросами пустой очереди.',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Завершиться, как только очередь опустеет.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *args: stop.set())
+        name = worker_name()
+        self.stdout.write(f'Обработчик {name} запущен.')
+        processed = work(name, stop, options['poll_interval'],
+                         options['burst'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработчик {name} остановлен, задач обработано: {processed}'
+        ))
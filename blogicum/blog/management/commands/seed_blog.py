@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.db.models import Model
+
+from blog.search import rebuild_index
+from blog.seeding import (DEFAULT_BATCH_SIZE, SeedPlan, rebuild_comment_counts,
+                          reset_caches, seed_blog, sqlite_bulk_load,
+                          without_indexes)
+
+
+class Command(BaseCommand):
+    help = ('Быстро наполняет БД синтетическими пользователями, '
+            'категориями, местами, постами и комментариями для '
+            'нагрузочных тестов.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        for field, default in SeedPlan._field_defaults.items():
+            parser.add_argument(
+                f'--{field}',
+                type=int,
+                default=default,
+                help=f'Сколько создать объектов ({field}).',
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора: одинаковое зерно даёт те же данные.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Строк в одной транзакции bulk_create.',
+        )
+        parser.add_argument(
+            '--drop-indexes',
+            action='store_true',
+            help=('Удалить индексы лент на время загрузки и построить '
+                  'их заново после неё.'),
+        )
+
+    def handle(self, *args, **options) -> None:
+        plan = SeedPlan(**{field: options[field]
+                           for field in SeedPlan._fields})
+        if plan.posts and not (plan.users and plan.categories
+                               and plan.locations):
+            raise SystemExit('Для постов нужны пользователи, категории '
+                             'и места.')
+        if plan.comments and not plan.posts:
+            raise SystemExit('Для комментариев нужны посты.')
+        self.started = time.perf_counter()
+        with sqlite_bulk_load():
+            if options['drop_indexes']:
+                with without_indexes():
+                    created = self.load(plan, options)
+                self.report('Индексы построены')
+            else:
+                created = self.load(plan, options)
+            rebuild_comment_counts()
+            self.report('Счётчики комментариев пересчитаны')
+            rebuild_index()
+            self.report('Поисковый индекс построен')
+            if connection.vendor in ('sqlite', 'postgresql'):
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+        reset_caches()
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{label}: {total}' for label, total in created.items())
+            + f' за {time.perf_counter() - self.started:.1f} с'
+        ))
+
+    def load(self, plan: SeedPlan, options: dict) -> dict:
+        return seed_blog(plan, options['seed'], options['batch_size'],
+                         progress=self.progress)
+
+    def progress(self, model: type[Model], created: int) -> None:
+        self.report(f'{model._meta.verbose_name_plural}: {created}')
+
+    def report(self, message: str) -> None:
+        self.stdout.write(
+            f'[{time.perf_counter() - self.started:7.1f} с] {message}'
+        )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from blog.instrumentation import (get_aggregates, get_sample_rate,
+                                  reset_aggregates)
+
+COLUMNS = ('requests', 'sql_count', 'sql_ms', 'template_ms', 'total_ms')
+
+
+class Command(BaseCommand):
+    help = ('Показывает средние показатели InstrumentationMiddleware '
+            'по представлениям: число и время SQL, время шаблонов и '
+            'общее время ответа.')
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--sort',
+            choices=COLUMNS,
+            default='total_ms',
+            help='Столбец для сортировки по убыванию.',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить накопленные показатели после вывода.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        aggregates = get_aggregates()
+        self.stdout.write(f'Доля замеряемых запросов: {get_sample_rate()}')
+        self.stdout.write(f'{"представление":<28}' + ''.join(
+            f'{column:>13}' for column in COLUMNS
+        ))
+        for view_name, values in sorted(
+                aggregates.items(),
+                key=lambda item: item[1][options['sort']],
+                reverse=True):
+            self.stdout.write(f'{view_name:<28}' + ''.join(
+                f'{values[column]:>13.1f}' if column != 'requests'
+                else f'{values[column]:>13}'
+                for column in COLUMNS
+            ))
+        if options['reset']:
+            reset_aggregates()
+            self.stdout.write(self.style.SUCCESS('Показатели обнулены.'))
@@ -0,0 +1,140 @@
+import asyncio
+import random
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+
+from blog.cache import bump_generation, get_generation
+from blog.concurrency import run_sync
+from blog.instrumentation import (RequestMetrics, get_sample_rate,
+                                  measure_request, record)
+from blog.services import timeout_until_publication
+
+PAGE_GENERATION = 'page'
+PAGE_CACHE_PARAMS = ('page', 'cursor')
+DEFAULT_PAGE_CACHE_TIMEOUT = 300
+
+
+def invalidate_pages() -> None:
+    '''Сбрасывает все закешированные страницы для анонимов.'''
+    bump_generation(PAGE_GENERATION)
+
+
+def get_page_cache_timeout() -> int:
+    '''Время жизни страницы в кеше: не дольше настройки и не дольше,
+    чем до появления ближайшей отложенной публикации.
+    '''
+    return timeout_until_publication(getattr(
+        settings, 'BLOG_PAGE_CACHE_TIMEOUT', DEFAULT_PAGE_CACHE_TIMEOUT,
+    ))
+
+
+class AnonymousPageCacheMiddleware:
+    '''Кеширует страницы лент и статические страницы целиком для
+    анонимных посетителей. Список представлений задаётся настройкой
+    BLOG_PAGE_CACHE_VIEWS, ключ учитывает только параметры page и cursor.
+    Авторизованные пользователи видят другую шапку и обходят кеш.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.views = frozenset(getattr(settings, 'BLOG_PAGE_CACHE_VIEWS', ()))
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self.store(request, response)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        response = await self.get_response(request)
+        if getattr(request, '_page_cache_key', None) is not None:
+            await run_sync(self.store, request, response)
+        return response
+
+    def store(self, request: HttpRequest, response: HttpResponse) -> None:
+        key = getattr(request, '_page_cache_key', None)
+        if (key is not None
+                and response.status_code == 200
+                and not response.cookies
+                and not response.streaming):
+            cache.set(key, response, timeout=get_page_cache_timeout())
+
+    def process_view(self, request: HttpRequest, view_func: Callable,
+                     view_args: tuple, view_kwargs: dict
+                     ) -> Optional[HttpResponse]:
+        key = self.get_cache_key(request)
+        if key is None:
+            return None
+        response = cache.get(key)
+        if response is None:
+            request._page_cache_key = key
+        return response
+
+    def get_cache_key(self, request: HttpRequest) -> Optional[str]:
+        if (request.method not in ('GET', 'HEAD')
+                or request.resolver_match.view_name not in self.views
+                or request.user.is_authenticated):
+            return None
+        params = '&'.join(f'{name}={request.GET[name]}'
+                          for name in PAGE_CACHE_PARAMS
+                          if name in request.GET)
+        return (f'blog:page:{get_generation(PAGE_GENERATION)}:'
+                f'{request.path}?{params}')
+
+
+class InstrumentationMiddleware:
+    '''Замеряет у доли запросов (BLOG_INSTRUMENTATION_SAMPLE_RATE)
+    число и время SQL-запросов, время отрисовки шаблонов и общее
+    время ответа, копит средние по представлениям и отдаёт замер
+    в заголовке Server-Timing. При нулевой доле отключается целиком.
+    Ставится первым в MIDDLEWARE, чтобы учитывать остальные.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.sample_rate = get_sample_rate()
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(
+            settings, 'BLOG_INSTRUMENTATION_SERVER_TIMING', True)
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        with measure_request() as metrics:
+            response = self.get_response(request)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        with measure_request() as metrics:
+            response = await self.get_response(request)
+        # record() обращается к кешу; сетевой кеш не должен
+        # блокировать цикл событий.
+        return await run_sync(self.report, request, response, metrics)
+
+    def report(self, request: HttpRequest, response: HttpResponse,
+               metrics: RequestMetrics) -> HttpResponse:
+        if request.resolver_match is not None:
+            record(request.resolver_match.view_name, metrics)
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing()
+        return response
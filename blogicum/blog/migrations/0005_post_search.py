@@ -0,0 +1,34 @@
+from django.db import migrations
+
+SEARCH_TABLE = 'blog_post_search'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+        f"title, text, tokenize='unicode61 remove_diacritics 2', "
+        f"prefix='2 3')"
+    )
+    schema_editor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, title, text) '
+        f'SELECT id, title, text FROM blog_post'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
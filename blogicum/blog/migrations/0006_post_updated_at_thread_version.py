@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-18 21:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thread_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Увеличивается при добавлении, правке и удалении комментариев.', verbose_name='Версия обсуждения'),
+        ),
+    ]
@@ -1,52 +1,218 @@
+import hashlib
+from typing import Optional, Union
+
 from django.core.exceptions import PermissionDenied
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 from django.http import Http404
+from django.db.models import Model, QuerySet
+from django.core.paginator import Page
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 
+from blog.cache import get_generation
 from blog.forms import PostForm, CommentForm
 from blog.models import Post, Comment
+from blog.paginators import CursorPage
+from blog.routers import read_from_replica
+from blog.services import (PostVersion, get_cursor_paginator,
+                           get_paginator, get_post_version)
+from blog.templatetags.blog_tags import POST_CARD_GENERATION
+from blog.uploads import restore_rejected_uploads
+
+PAGINATION_NUMBERED = 'numbered'
+PAGINATION_CURSOR = 'cursor'
+
+
+class ReplicaReadMixin:
+    '''GET и HEAD читают данные с реплики. Ответ отрисовывается
+    внутри блока, иначе ленивые запросы шаблона ушли бы на основную БД.
+    '''
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica(request.user):
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+def get_post_etag(request: HttpRequest, version: PostVersion) -> str:
+    '''ETag страницы поста: версии поста и обсуждения и всё, что на
+    странице зависит от читателя - пользователь (кнопки правки),
+    CSRF-cookie (токен формы комментария), - а также поколение
+    карточек, которое меняют правки авторов, категорий и мест.
+    '''
+    # Токен формы комментария нужен заранее: шаблон отрисуется после
+    # расчёта ETag. get_token() маскирует токен заново при каждом
+    # вызове, поэтому в ETag идёт значение cookie.
+    get_token(request)
+    raw = ':'.join(str(part) for part in (
+        version.updated_at.isoformat(),
+        version.thread_version,
+        request.user.pk,
+        request.META['CSRF_COOKIE'],
+        get_generation(POST_CARD_GENERATION),
+    ))
+    return quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+
+
+def set_post_etag(response: HttpResponse, etag: str) -> HttpResponse:
+    # Страница личная, а браузер должен сверять её при каждом показе.
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def get_post_not_modified(request: HttpRequest,
+                          pk: int) -> Optional[HttpResponse]:
+    '''Ответ 304 на If-None-Match по одной лёгкой выборке версии поста.
+    Возвращает - None, если страницу нужно отрисовать (пост изменился,
+    не найден или недоступен читателю)
+    '''
+    version = get_post_version(pk)
+    if version is None or (not version.is_published
+                           and version.author_id != request.user.pk):
+        return None
+    etag = get_post_etag(request, version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        return None
+    return set_post_etag(response, etag)
+
+
+class ConditionalPostMixin:
+    '''Страница поста с ETag: повторный запрос с If-None-Match
+    получает 304 без загрузки поста и комментариев.
+    '''
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        conditional = (request.method in ('GET', 'HEAD')
+                       and 'HTTP_IF_NONE_MATCH' in request.META)
+        if conditional and request.user.is_authenticated:
+            response = get_post_not_modified(request, self.kwargs['pk'])
+            if response is not None:
+                return response
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            post = self.object
+            set_post_etag(response, get_post_etag(request, PostVersion(
+                post.updated_at, post.thread_version,
+                post.is_published, post.author_id,
+            )))
+        return response
 
 
 class DispatchNeededMixin:
+    '''Проверяет права на объект до обработки запроса.
+    Объект, загруженный для проверки, сохраняется в checked_object
+    и возвращается из get_object(), чтобы не запрашивать его дважды.
+    '''
+    checked_object = None
 
     def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
-        view_name = request.resolver_match.view_name
-        dispatch_dict = {
-            'blog:edit_comment': dispatch_comment,
-            'blog:delete_comment': dispatch_comment,
-            'blog:post_detail': dispatch_post_detail,
-            'blog:delete_post': dispatch_post_delete,
-            'blog:edit_profile': dispatch_user_edit,
-        }
-        for view_url in dispatch_dict:
-            if view_name == view_url:
-                dispatch_dict[view_url](self, request, *args, **kwargs)
+        check = DISPATCH_CHECKS.get(request.resolver_match.view_name)
+        if check is not None:
+            self.checked_object = check(self, request, *args, **kwargs)
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset: Optional[QuerySet] = None) -> Model:
+        if queryset is None and self.checked_object is not None:
+            return self.checked_object
+        return super().get_object(queryset)
+
 
-def dispatch_comment(self, request: HttpRequest, *args, **kwargs):
-    comment = get_object_or_404(self.model, pk=self.kwargs['post_id'])
-    if comment.author != request.user:
+def dispatch_comment(self, request: HttpRequest, *args, **kwargs) -> Comment:
+    comment = get_object_or_404(self.model, pk=self.kwargs['comment_id'])
+    if comment.author_id != request.user.id:
         raise PermissionDenied
+    return comment
 
 
-def dispatch_post_detail(self, request: HttpRequest, *args, **kwargs):
-    instance = get_object_or_404(self.model, id=self.kwargs['pk'])
+def dispatch_post_detail(self, request: HttpRequest, *args, **kwargs) -> Post:
+    instance = get_object_or_404(
+        self.model.objects.select_related('author', 'location', 'category'),
+        pk=self.kwargs['pk'],
+    )
     if instance.is_published is False and request.user != instance.author:
         raise Http404
+    return instance
 
 
-def dispatch_post_delete(self, request: HttpRequest, *args, **kwargs):
+def dispatch_post_delete(self, request: HttpRequest, *args, **kwargs) -> Post:
     post = get_object_or_404(self.model, pk=self.kwargs['post_id'])
-    if post.author != request.user:
+    if post.author_id != request.user.id:
         raise PermissionDenied
+    return post
 
 
-def dispatch_user_edit(self, request: HttpRequest, *args, **kwargs):
+def dispatch_user_edit(self, request: HttpRequest, *args, **kwargs) -> User:
     instance = get_object_or_404(User, pk=self.kwargs['pk'])
     if instance.id != request.user.id:
         raise PermissionDenied
+    return instance
+
+
+DISPATCH_CHECKS = {
+    'blog:edit_comment': dispatch_comment,
+    'blog:delete_comment': dispatch_comment,
+    'blog:post_detail': dispatch_post_detail,
+    'blog:post_comments': dispatch_post_detail,
+    'blog:delete_post': dispatch_post_delete,
+    'blog:edit_profile': dispatch_user_edit,
+}
+
+
+class FeedPaginationMixin:
+    '''Выбор способа постраничного вывода ленты для представления:
+    PAGINATION_NUMBERED - номера страниц (?page=),
+    PAGINATION_CURSOR - курсор без COUNT (?cursor=).
+    '''
+    pagination_mode = PAGINATION_NUMBERED
+
+    def paginate_feed(self, objects: QuerySet,
+                      posts_on_page: int) -> Union[Page, CursorPage]:
+        if self.pagination_mode == PAGINATION_CURSOR:
+            return get_cursor_paginator(
+                objects=objects,
+                cursor=self.request.GET.get('cursor'),
+                posts_on_page=posts_on_page,
+            )
+        return get_paginator(
+            objects=objects,
+            page_number=self.request.GET.get('page'),
+            posts_on_page=posts_on_page,
+            count_key=self.get_count_key(),
+        )
+
+    def get_legacy_page_redirect(self) -> Optional[HttpResponseRedirect]:
+        '''Ссылки ?page=N остались от вывода по номерам страниц. В режиме
+        курсора номер не переводится в курсор без того же OFFSET, поэтому
+        такая ссылка перенаправляет на первую страницу ленты.
+        Возвращает - перенаправление, либо None
+        '''
+        if (self.pagination_mode != PAGINATION_CURSOR
+                or 'page' not in self.request.GET):
+            return None
+        params = self.request.GET.copy()
+        params.pop('page')
+        query = params.urlencode()
+        return HttpResponseRedirect(
+            f'{self.request.path}?{query}' if query else self.request.path
+        )
+
+    def get_count_key(self) -> str:
+        '''Ключ ленты для кеша количества постов: имя представления
+        и его аргументы (слаг категории, имя автора).
+        '''
+        match = self.request.resolver_match
+        kwargs = ':'.join(f'{key}={value}'
+                          for key, value in sorted(match.kwargs.items()))
+        return f'{match.view_name}:{kwargs}'
 
 
 class PostMixin:
@@ -54,7 +220,20 @@ class PostMixin:
     model = Post
 
 
-class PostModelMixin:
+class RejectedUploadMixin:
+    '''Передаёт форме файлы, загрузку которых прервал
+    LimitedTemporaryFileUploadHandler, чтобы она сообщила об ошибке.
+    '''
+
+    def get_form_kwargs(self) -> dict:
+        kwargs = super().get_form_kwargs()
+        if 'files' in kwargs:
+            kwargs['files'] = restore_rejected_uploads(self.request,
+                                                       kwargs['files'])
+        return kwargs
+
+
+class PostModelMixin(RejectedUploadMixin):
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
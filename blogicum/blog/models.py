@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from blog.storage import get_post_image_storage
 from pages.models import PublishedModel
 
 
@@ -84,13 +85,46 @@ class Post(PublishedModel):
     image = models.ImageField(
         'Изображение',
         upload_to='post_images',
+        storage=get_post_image_storage,
         blank=True,
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено',
+    )
+    thread_version = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия обсуждения',
+        help_text=('Увеличивается при добавлении, правке и удалении '
+                   'комментариев.'),
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', 'category'),
+                condition=models.Q(is_published=True),
+                name='post_published_feed_idx',
+            ),
+            models.Index(
+                fields=('category', '-pub_date'),
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_author_feed_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.title
@@ -112,6 +146,86 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text
+
+
+class Job(models.Model):
+    '''Фоновая задача из очереди blog.jobs, её выполняет run_worker.
+    '''
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Не выполнена'
+
+    task = models.CharField(max_length=200, verbose_name='Задача')
+    payload = models.JSONField(default=dict, verbose_name='Аргументы')
+    key = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Ключ идемпотентности',
+        help_text=('Пока задача с этим ключом не завершена, такая же '
+                   'задача повторно не ставится.'),
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Состояние',
+    )
+    run_at = models.DateTimeField(verbose_name='Выполнить не раньше')
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Наибольшее число попыток',
+    )
+    locked_by = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Обработчик',
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Занята до',
+        help_text=('Если обработчик не завершил задачу к этому времени, '
+                   'её забирает другой.'),
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Создана')
+    finished_at = models.DateTimeField(null=True, blank=True,
+                                       verbose_name='Завершена')
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_at', 'pk')
+        indexes = (
+            models.Index(
+                fields=('status', 'run_at'),
+                name='job_status_run_at_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('key',),
+                condition=(models.Q(status__in=('pending', 'running'))
+                           & ~models.Q(key='')),
+                name='job_unfinished_key_uniq',
+            ),
+        )
+
+    def __str__(self) -> str:
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Model, Q
+from django.utils.functional import cached_property
+from django.db.models.query import QuerySet
+from django.utils.dateparse import parse_datetime
+
+from blog.cache import bump_generation, get_generation
+
+CURSOR_AFTER = 'a'
+CURSOR_BEFORE = 'b'
+
+COUNT_GENERATION = 'post_count'
+DEFAULT_PAGE_COUNT_TIMEOUT = 60
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction: str, pub_date: datetime, pk: int) -> str:
+    '''Упаковывает позицию в ленте в непрозрачный токен для ?cursor=.
+    '''
+    raw = json.dumps([direction, pub_date.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> tuple[str, datetime, int]:
+    '''Распаковывает токен курсора:
+    Вход - token: str
+    Возвращает - (направление, pub_date, id)
+    '''
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, pub_date, pk = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidCursor(token)
+    if direction not in (CURSOR_AFTER, CURSOR_BEFORE) or pub_date is None:
+        raise InvalidCursor(token)
+    return direction, pub_date, pk
+
+
+class CursorPage:
+    '''Страница ленты, полученная по курсору (pub_date, id).
+    Повторяет ту часть интерфейса Page, которую использует шаблон.
+    '''
+    is_cursor = True
+
+    def __init__(self, object_list: list[Model],
+                 has_next: bool, has_previous: bool) -> None:
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self) -> Iterator[Model]:
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index: int) -> Model:
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self) -> Optional[str]:
+        if not self._has_next or not self.object_list:
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(CURSOR_AFTER, last.pub_date, last.pk)
+
+    @property
+    def previous_cursor(self) -> Optional[str]:
+        if not self._has_previous or not self.object_list:
+            return None
+        first = self.object_list[0]
+        return encode_cursor(CURSOR_BEFORE, first.pub_date, first.pk)
+
+
+class CursorPaginator:
+    '''Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET:
+    каждая страница выбирается условием по позиции последнего
+    показанного поста, поэтому глубокие страницы не дороже первой.
+    '''
+
+    def __init__(self, queryset: QuerySet, per_page: int) -> None:
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def get_page(self, cursor: Optional[str]) -> CursorPage:
+        '''Возвращает страницу по токену курсора; пустой или
+        повреждённый токен даёт первую страницу.
+        '''
+        try:
+            direction, pub_date, pk = decode_cursor(cursor or '')
+        except InvalidCursor:
+            return self._first_page()
+        if direction == CURSOR_AFTER:
+            return self._page_after(pub_date, pk)
+        return self._page_before(pub_date, pk)
+
+    def _fetch(self, queryset: QuerySet) -> tuple[list[Model], bool]:
+        rows = list(queryset[:self.per_page + 1])
+        return rows[:self.per_page], len(rows) > self.per_page
+
+    def _first_page(self) -> CursorPage:
+        rows, has_next = self._fetch(
+            self.queryset.order_by('-pub_date', '-pk')
+        )
+        return CursorPage(rows, has_next=has_next, has_previous=False)
+
+    def _page_after(self, pub_date: datetime, pk: int) -> CursorPage:
+        rows, has_next = self._fetch(
+            self.queryset
+                .filter(Q(pub_date__lt=pub_date)
+                        | Q(pub_date=pub_date, pk__lt=pk))
+                .order_by('-pub_date', '-pk')
+        )
+        return CursorPage(rows, has_next=has_next, has_previous=True)
+
+    def _page_before(self, pub_date: datetime, pk: int) -> CursorPage:
+        rows, has_previous = self._fetch(
+            self.queryset
+                .filter(Q(pub_date__gt=pub_date)
+                        | Q(pub_date=pub_date, pk__gt=pk))
+                .order_by('pub_date', 'pk')
+        )
+        if not rows:
+            return self._first_page()
+        rows.reverse()
+        return CursorPage(rows, has_next=True, has_previous=has_previous)
+
+
+def invalidate_post_counts() -> None:
+    '''Сбрасывает все закешированные количества постов в лентах.
+    Вызывается при сохранении и удалении постов и категорий.
+    '''
+    bump_generation(COUNT_GENERATION)
+
+
+class ElidedPage(Page):
+    '''Страница с сокращённым списком номеров: 1, 2, …, 7, 8, 9, …'''
+
+    @property
+    def elided_page_range(self) -> Iterator:
+        return self.paginator.get_elided_page_range(
+            self.number, on_each_side=2, on_ends=1,
+        )
+
+
+class CachedCountPaginator(Paginator):
+    '''Пагинатор, который хранит количество объектов в кеше по
+    ключу ленты (представление, категория, автор) вместо того,
+    чтобы выполнять COUNT при каждом просмотре страницы.
+    Значение приблизительное: живёт не дольше BLOG_PAGE_COUNT_TIMEOUT
+    и сбрасывается при изменении постов и категорий.
+    '''
+
+    def __init__(self, object_list: QuerySet, per_page: int,
+                 count_key: Optional[str] = None, **kwargs) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self) -> int:
+        if self.count_key is None:
+            return super().count
+        key = (f'blog:post_count:{get_generation(COUNT_GENERATION)}:'
+               f'{self.count_key}')
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, timeout=getattr(
+                settings, 'BLOG_PAGE_COUNT_TIMEOUT',
+                DEFAULT_PAGE_COUNT_TIMEOUT,
+            ))
+        return count
+
+    def _get_page(self, *args, **kwargs) -> ElidedPage:
+        return ElidedPage(*args, **kwargs)
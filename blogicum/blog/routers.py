@@ -0,0 +1,84 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+DEFAULT_STICKY_SECONDS = 15
+
+_read_alias: ContextVar[Optional[str]] = ContextVar(
+    'blog_read_alias', default=None,
+)
+
+
+def get_replicas() -> list[str]:
+    return list(getattr(settings, 'BLOG_REPLICA_DATABASES', ()))
+
+
+def _sticky_key(user_id: int) -> str:
+    return f'blog:replica_sticky:{user_id}'
+
+
+def mark_sticky(user_id: Optional[int]) -> None:
+    '''После записи пользователь читает с основной БД, пока реплики
+    не догонят её (BLOG_REPLICA_STICKY_SECONDS).
+    '''
+    if user_id is None or not get_replicas():
+        return
+    cache.set(_sticky_key(user_id), True, timeout=getattr(
+        settings, 'BLOG_REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS,
+    ))
+
+
+def is_sticky(user: AnonymousUser) -> bool:
+    return (user.is_authenticated
+            and cache.get(_sticky_key(user.pk), False))
+
+
+@contextmanager
+def read_from_replica(user: AnonymousUser) -> Iterator[Optional[str]]:
+    '''Направляет чтения внутри блока на случайную реплику.
+    Вход - user: автор запроса; если он недавно что-то записал,
+    чтения остаются на основной БД
+    Возвращает - псевдоним реплики или None
+    '''
+    replicas = get_replicas()
+    alias = None
+    if replicas and not is_sticky(user):
+        alias = random.choice(replicas)
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    '''Чтения из блока read_from_replica идут на реплику, всё
+    остальное - на основную БД. Схему реплики получают при
+    репликации, поэтому миграции к ним не применяются.
+    '''
+
+    def db_for_read(self, model: type[Model], **hints) -> Optional[str]:
+        return _read_alias.get()
+
+    def db_for_write(self, model: type[Model], **hints) -> str:
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model,
+                       **hints) -> Optional[bool]:
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str,
+                      **hints) -> Optional[bool]:
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,237 @@
+import base64
+import binascii
+import json
+import re
+from typing import NamedTuple, Optional
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.query import QuerySet
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+from django.utils.text import Truncator
+
+from blog.models import Post
+from blog.services import get_posts
+
+SEARCH_TABLE = 'blog_post_search'
+MAX_TERMS = 10
+SNIPPET_TOKENS = 24
+# Вес совпадения в заголовке и в тексте для bm25().
+TITLE_WEIGHT = 5.0
+TEXT_WEIGHT = 1.0
+# Маркеры подсветки, которых нет в тексте: snippet() возвращает
+# исходный текст, поэтому сначала он экранируется, а потом маркеры
+# заменяются на <mark>.
+MARK_START = '\x02'
+MARK_END = '\x03'
+TERM_RE = re.compile(r'\w+')
+
+
+class InvalidSearchCursor(Exception):
+    pass
+
+
+class SearchHit(NamedTuple):
+    rank: float
+    pk: int
+    title: str
+    snippet: str
+
+
+class SearchPage(NamedTuple):
+    '''Страница результатов: посты с атрибутами search_title и
+    search_snippet (безопасный HTML с <mark>) и курсор следующей.
+    '''
+    posts: list[Post]
+    next_cursor: Optional[str]
+
+
+def is_supported(alias: str) -> bool:
+    return connections[alias].vendor == 'sqlite'
+
+
+def build_match_query(text: str) -> Optional[str]:
+    '''Переводит строку поиска в запрос FTS5: каждое слово ищется
+    как префикс ("кот"* находит "котов"), все слова обязательны.
+    Возвращает - запрос или None, если слов нет
+    '''
+    terms = TERM_RE.findall(text.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def encode_search_cursor(rank: float, pk: int) -> str:
+    raw = json.dumps([rank, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_search_cursor(token: str) -> tuple[float, int]:
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        rank, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(rank), int(pk)
+    except (binascii.Error, TypeError, ValueError):
+        raise InvalidSearchCursor(token)
+
+
+def highlight(text: str) -> SafeString:
+    return mark_safe(escape(text)
+                     .replace(MARK_START, '<mark>')
+                     .replace(MARK_END, '</mark>'))
+
+
+def index_post(post: Post) -> None:
+    '''Обновляет запись поста в поисковом индексе.'''
+    if not is_supported('default'):
+        return
+    with connections['default'].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                       [post.pk])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, text) '
+            f'VALUES (%s, %s, %s)',
+            [post.pk, post.title, post.text],
+        )
+
+
+def unindex_post(pk: int) -> None:
+    if not is_supported('default'):
+        return
+    with connections['default'].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                       [pk])
+
+
+def rebuild_index() -> int:
+    '''Заново заполняет индекс из blog_post одним INSERT ... SELECT
+    и сжимает его (optimize).
+    Возвращает - число проиндексированных постов
+    '''
+    if not is_supported('default'):
+        return 0
+    with connections['default'].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, text) '
+            f'SELECT id, title, text FROM {Post._meta.db_table}'
+        )
+        count = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) "
+            f"VALUES ('optimize')"
+        )
+    return count
+
+
+def filter_admin_queryset(queryset: QuerySet[Post],
+                          text: str) -> QuerySet[Post]:
+    '''Ограничивает queryset постами, найденными по индексу.'''
+    match = build_match_query(text)
+    if match is None:
+        return queryset
+    if not is_supported(queryset.db):
+        return queryset.filter(Q(title__icontains=text)
+                               | Q(text__icontains=text))
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} '
+        f'WHERE {SEARCH_TABLE} MATCH %s',
+        (match,),
+    ))
+
+
+def _fetch_hits(alias: str, match: str, after: Optional[tuple[float, int]],
+                limit: int) -> list[SearchHit]:
+    '''Следующие limit совпадений по возрастанию (bm25, id): в SQLite
+    bm25() тем меньше, чем выше релевантность.
+    '''
+    keyset = ''
+    params = [MARK_START, MARK_END, MARK_START, MARK_END, match]
+    if after is not None:
+        keyset = 'AND (score > %s OR (score = %s AND rowid > %s))'
+        params += [after[0], after[0], after[1]]
+    sql = (
+        f'SELECT bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {TEXT_WEIGHT}) '
+        f'AS score, rowid, '
+        f'highlight({SEARCH_TABLE}, 0, %s, %s), '
+        f"snippet({SEARCH_TABLE}, 1, %s, %s, '…', {SNIPPET_TOKENS}) "
+        f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s {keyset} '
+        f'ORDER BY score, rowid LIMIT %s'
+    )
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, [*params, limit])
+        return [SearchHit(*row) for row in cursor.fetchall()]
+
+
+def _visible_posts(alias: str, match: str,
+                   after: Optional[tuple[float, int]],
+                   limit: int) -> list[Post]:
+    '''Дочитывает совпадения пачками, пока не наберётся limit видимых
+    постов: скрытые get_posts() отбрасывает.
+    '''
+    visible = []
+    while len(visible) < limit:
+        hits = _fetch_hits(alias, match, after, limit)
+        if not hits:
+            break
+        posts = get_posts().in_bulk([hit.pk for hit in hits])
+        for hit in hits:
+            post = posts.get(hit.pk)
+            if post is not None:
+                post.search_title = highlight(hit.title)
+                post.search_snippet = highlight(hit.snippet)
+                post.search_rank = hit.rank
+                visible.append(post)
+        after = (hits[-1].rank, hits[-1].pk)
+        if len(hits) < limit:
+            break
+    return visible
+
+
+def search_posts(text: str, cursor: Optional[str],
+                 per_page: int) -> SearchPage:
+    '''Поиск по опубликованным постам:
+    Вход - text: строка поиска, cursor: токен из next_cursor
+    предыдущей страницы, per_page: постов на странице
+    Возвращает - SearchPage; видимость постов та же, что в get_posts()
+    '''
+    match = build_match_query(text)
+    if match is None:
+        return SearchPage([], None)
+    alias = router.db_for_read(Post) or 'default'
+    try:
+        after = decode_search_cursor(cursor) if cursor else None
+    except InvalidSearchCursor:
+        after = None
+    if not is_supported(alias):
+        return _search_without_index(text, after, per_page)
+    visible = _visible_posts(alias, match, after, per_page + 1)
+    next_cursor = None
+    if len(visible) > per_page:
+        last = visible[per_page - 1]
+        next_cursor = encode_search_cursor(last.search_rank, last.pk)
+    return SearchPage(visible[:per_page], next_cursor)
+
+
+def _search_without_index(text: str, after: Optional[tuple[float, int]],
+                          per_page: int) -> SearchPage:
+    '''Запасной поиск для СУБД без FTS5: подстрока, новые посты
+    выше, курсор по id.
+    '''
+    posts = get_posts().filter(
+        Q(title__icontains=text) | Q(text__icontains=text)
+    ).order_by('-pk')
+    if after is not None:
+        posts = posts.filter(pk__lt=after[1])
+    posts = list(posts[:per_page + 1])
+    for post in posts:
+        post.search_title = escape(post.title)
+        post.search_snippet = escape(
+            Truncator(post.text).words(SNIPPET_TOKENS)
+        )
+    next_cursor = None
+    if len(posts) > per_page:
+        next_cursor = encode_search_cursor(0, posts[per_page - 1].pk)
+    return SearchPage(posts[:per_page], next_cursor)
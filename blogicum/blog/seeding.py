@@ -0,0 +1,244 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Iterator, NamedTuple, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Count, Max, Model, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from faker import Faker
+
+from blog.cache import bump_generation
+from blog.feeds import invalidate_feeds
+from blog.middleware import invalidate_pages
+from blog.models import Category, Comment, Location, Post
+from blog.paginators import invalidate_post_counts
+from blog.services import invalidate_categories
+from blog.templatetags.blog_tags import POST_CARD_GENERATION
+
+DEFAULT_BATCH_SIZE = 10_000
+# Тексты берутся из заранее созданного набора: Faker на каждую
+# строку стал бы самой медленной частью загрузки.
+TEXT_POOL_SIZE = 1000
+UNUSABLE_PASSWORD = '!'
+# Значения PRAGMA на время загрузки: без fsync и журнала на диске.
+# При сбое загрузки БД может оказаться повреждённой - только для
+# тестовых стендов.
+SQLITE_LOAD_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': '-262144',
+}
+
+
+class SeedPlan(NamedTuple):
+    users: int = 100
+    categories: int = 50
+    locations: int = 50
+    posts: int = 10_000
+    comments: int = 50_000
+
+
+class TextPool:
+    '''Детерминированный набор строк Faker для заполнения полей.'''
+
+    def __init__(self, rng: random.Random, seed: int) -> None:
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        self.rng = rng
+        self.titles = [fake.sentence(nb_words=5)[:256]
+                       for _ in range(TEXT_POOL_SIZE)]
+        self.texts = [fake.paragraph(nb_sentences=6)
+                      for _ in range(TEXT_POOL_SIZE)]
+        self.names = [fake.city() for _ in range(TEXT_POOL_SIZE)]
+
+    def title(self) -> str:
+        return self.rng.choice(self.titles)
+
+    def text(self) -> str:
+        return self.rng.choice(self.texts)
+
+    def name(self) -> str:
+        return self.rng.choice(self.names)
+
+
+def next_pk(model: type[Model]) -> int:
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def reset_sequences(models: list[type[Model]]) -> None:
+    '''Переводит последовательности первичных ключей за вставленные
+    строки. Строки создаются с явными pk, и без этого на PostgreSQL
+    следующая обычная вставка получила бы уже занятый ключ. SQLite
+    берёт следующий ключ из максимального, ему сброс не нужен.
+    '''
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if not statements:
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+@contextmanager
+def sqlite_bulk_load() -> Iterator[None]:
+    '''Ускоряет массовую вставку в SQLite, отключая fsync и журнал на
+    диске, и возвращает прежние значения PRAGMA после загрузки.
+    На других СУБД и внутри транзакции, где SQLite не даёт менять
+    эти PRAGMA, ничего не делает.
+    '''
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        previous = {}
+        for pragma, value in SQLITE_LOAD_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}')
+            previous[pragma] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for pragma, value in previous.items():
+                cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@contextmanager
+def without_indexes() -> Iterator[None]:
+    '''Удаляет индексы из Meta.indexes моделей Post и Comment на время
+    блока и создаёт их заново: построить индекс один раз быстрее, чем
+    обновлять его при каждой вставке.
+    '''
+    indexes = [(model, index)
+               for model in (Post, Comment)
+               for index in model._meta.indexes]
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
+
+
+def rebuild_comment_counts() -> int:
+    '''Пересчитывает Post.comment_count одним UPDATE: bulk_create не
+    вызывает сигналы, которые обычно поддерживают счётчик.
+    Возвращает - число обновлённых постов
+    '''
+    counts = (Comment.objects
+              .filter(post_id=OuterRef('pk'))
+              .order_by()
+              .values('post_id')
+              .annotate(total=Count('id'))
+              .values('total'))
+    return Post.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+def reset_caches() -> None:
+    '''Сбрасывает кеши, которые после обычных изменений сбрасывают
+    сигналы: счётчики лент, категории, карточки, страницы и RSS.
+    '''
+    invalidate_post_counts()
+    invalidate_categories()
+    bump_generation(POST_CARD_GENERATION)
+    invalidate_pages()
+    invalidate_feeds()
+
+
+def _bulk_insert(model: type[Model], objects: Iterator[Model],
+                 total: int, batch_size: int,
+                 progress: Optional[Callable[[Model, int], None]]) -> None:
+    created = 0
+    while created < total:
+        batch = [next(objects)
+                 for _ in range(min(batch_size, total - created))]
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+        if progress is not None:
+            progress(model, created)
+
+
+def seed_blog(plan: SeedPlan, seed: int = 0,
+              batch_size: int = DEFAULT_BATCH_SIZE,
+              progress: Optional[Callable[[Model, int], None]] = None
+              ) -> dict[str, int]:
+    '''Наполняет БД синтетическими данными пачками bulk_create:
+    Вход - plan: сколько объектов каждого вида создать,
+    seed: зерно генератора, batch_size: строк в одной транзакции,
+    progress: вызывается после каждой пачки (модель, создано)
+    Возвращает - {модель: создано объектов}
+    Первичные ключи задаются явно, поэтому связи строятся без
+    повторного чтения вставленных строк; последовательности ключей
+    после загрузки сдвигаются за них.
+    '''
+    rng = random.Random(seed)
+    pool = TextPool(rng, seed)
+    now = timezone.now()
+    User = get_user_model()
+    user_start = next_pk(User)
+    category_start = next_pk(Category)
+    location_start = next_pk(Location)
+    post_start = next_pk(Post)
+    comment_start = next_pk(Comment)
+
+    users = (
+        User(pk=pk, username=f'user_{pk}', password=UNUSABLE_PASSWORD,
+             first_name=pool.name(), date_joined=now)
+        for pk in range(user_start, user_start + plan.users)
+    )
+    categories = (
+        Category(pk=pk, title=pool.title(), description=pool.text(),
+                 slug=f'category-{pk}', is_published=rng.random() > 0.1)
+        for pk in range(category_start, category_start + plan.categories)
+    )
+    locations = (
+        Location(pk=pk, name=pool.name(), is_published=True)
+        for pk in range(location_start, location_start + plan.locations)
+    )
+    posts = (
+        Post(
+            pk=pk,
+            title=pool.title(),
+            text=pool.text(),
+            # Около 2% постов отложены в будущее.
+            pub_date=now - timedelta(
+                minutes=rng.randrange(-20_000, 1_000_000)),
+            is_published=rng.random() > 0.05,
+            author_id=user_start + rng.randrange(plan.users),
+            category_id=category_start + rng.randrange(plan.categories),
+            location_id=(location_start + rng.randrange(plan.locations)
+                         if rng.random() > 0.2 else None),
+        )
+        for pk in range(post_start, post_start + plan.posts)
+    )
+    # Обсуждения распределены неравномерно: у небольшой доли постов
+    # собирается большая часть комментариев.
+    comments = (
+        Comment(
+            pk=pk,
+            text=pool.title(),
+            post_id=post_start + int(plan.posts * rng.random() ** 3),
+            author_id=user_start + rng.randrange(plan.users),
+        )
+        for pk in range(comment_start, comment_start + plan.comments)
+    )
+    created = {}
+    for model, objects, total in (
+            (User, users, plan.users),
+            (Category, categories, plan.categories),
+            (Location, locations, plan.locations),
+            (Post, posts, plan.posts),
+            (Comment, comments, plan.comments if plan.posts else 0)):
+        _bulk_insert(model, objects, total, batch_size, progress)
+        created[model._meta.label] = total
+    reset_sequences([User, Category, Location, Post, Comment])
+    return created
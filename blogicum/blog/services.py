@@ -1,67 +1,230 @@
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
 
-from django.core.paginator import Paginator, Page
+from django.conf import settings
+from django.core.paginator import Page
+from django.db.models import Min, Q
 from django.db.models.query import QuerySet
 from django.contrib.auth.models import User
-from django.db.models import Count
+from django.core.cache import cache
+from django.http import Http404
 from django.utils import timezone
 
-from blog.models import Post, Comment
+from blog.cache import bump_generation, get_generation
+from blog.clock import publication_now, publication_visible_at
+from blog.images import delete_derivatives
+from blog.paginators import CachedCountPaginator, CursorPage, CursorPaginator
+from blog.storage import post_image_storage
+from blog.models import Category, Post, Comment
 
+CATEGORY_GENERATION = 'category'
+CATEGORY_CACHE_TIMEOUT = 60 * 60
+DEFAULT_IMAGE_GC_DELAY = 60 * 60
 
-def get_posts() -> QuerySet[Post]:
+
+class PostVersion(NamedTuple):
+    '''Всё, что нужно для ETag страницы поста и проверки доступа.'''
+    updated_at: datetime
+    thread_version: int
+    is_published: bool
+    author_id: int
+
+
+def get_posts(now: Optional[datetime] = None) -> QuerySet[Post]:
     '''Отправляет запрос в БД формата:
-    Вход - None
+    Вход - now: datetime, по умолчанию показания часов публикации
     Возвращает - QuerySet[Post]
     '''
+    if now is None:
+        now = publication_now()
     return Post.objects.select_related(
         'author',
         'location',
         'category',
     ).filter(
-        pub_date__lte=timezone.now(),
+        pub_date__lte=now,
         is_published=True,
         category__is_published=True,
     )
 
 
-def get_posts_author(profile: User) -> QuerySet[Comment]:
-    return Post.objects.filter(author=profile)
+def timeout_until_publication(timeout: int) -> int:
+    '''Время жизни кеша ленты: не дольше timeout секунд и не дольше,
+    чем до появления ближайшей отложенной публикации.
+    '''
+    next_pub_date = Post.objects.filter(
+        is_published=True,
+        pub_date__gt=publication_now(),
+    ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+    if next_pub_date is not None:
+        until_visible = (publication_visible_at(next_pub_date)
+                         - timezone.now()).total_seconds()
+        timeout = min(timeout, max(int(until_visible), 1))
+    return timeout
 
 
-def get_post_pk_comments(pk: int) -> QuerySet[Comment]:
-    '''Отправляет запрос в БД формата:
-    Вход - None
-    Возвращает - QuerySet[Comment]
+def get_published_category(slug: str) -> Category:
+    '''Опубликованная категория по слагу из кеша или из БД:
+    Вход - slug: str
+    Возвращает - Category, либо вызывает Http404
     '''
-    return (Comment.objects
-                   .get_queryset()
-                   .filter(post_id=pk)
-                   .order_by('created_at'))
+    key = f'blog:category:{get_generation(CATEGORY_GENERATION)}:{slug}'
+    category = cache.get(key)
+    if category is None:
+        category = Category.objects.filter(
+            slug=slug, is_published=True,
+        ).first()
+        if category is None:
+            raise Http404('Категория не найдена или не опубликована')
+        cache.set(key, category, timeout=CATEGORY_CACHE_TIMEOUT)
+    return category
+
+
+def invalidate_categories() -> None:
+    '''Сбрасывает кеш категорий по слагу.'''
+    bump_generation(CATEGORY_GENERATION)
 
 
-def get_comments(profile: User) -> QuerySet[Comment]:
+def get_posts_author(profile: User) -> QuerySet[Post]:
     '''Отправляет запрос в БД формата:
     Вход - profile: User
+    Возвращает - QuerySet[Post] со связанными автором, местом и категорией
+    '''
+    return Post.objects.select_related(
+        'author',
+        'location',
+        'category',
+    ).filter(author=profile)
+
+
+def get_posts_username(username: str) -> QuerySet[Post]:
+    '''То же, что get_posts_author, но по имени автора: запрос ленты
+    не ждёт загрузки профиля.
+    '''
+    return Post.objects.select_related(
+        'author',
+        'location',
+        'category',
+    ).filter(author__username=username)
+
+
+def get_post_version(pk: int) -> Optional[PostVersion]:
+    '''Отправляет лёгкий запрос в БД, без текста и связанных объектов:
+    Вход - pk: id поста
+    Возвращает - PostVersion, либо None, если поста нет
+    '''
+    row = Post.objects.filter(pk=pk).values_list(
+        'updated_at', 'thread_version', 'is_published', 'author_id',
+    ).first()
+    return PostVersion(*row) if row is not None else None
+
+
+def get_post_pk_comments(
+        pk: int,
+        after: Optional[tuple[datetime, int]] = None) -> QuerySet[Comment]:
+    '''Отправляет запрос в БД формата:
+    Вход - pk: id поста, after: (created_at, id) комментария, после
+    которого начинать; условие повторяет порядок выборки
+    Возвращает - QuerySet[Comment] вместе с авторами комментариев
+    '''
+    queryset = (Comment.objects
+                       .select_related('author')
+                       .filter(post_id=pk)
+                       .order_by('created_at', 'pk'))
+    if after is not None:
+        created_at, comment_pk = after
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at)
+            | Q(created_at=created_at, pk__gt=comment_pk)
+        )
+    return queryset
+
+
+def get_comments_chunk(pk: int,
+                       after: Optional[tuple[datetime, int]],
+                       limit: int) -> tuple[list[Comment], bool]:
+    '''Порция ветки комментариев для постраничной подгрузки:
+    Вход - pk: id поста, after: (created_at, id) последнего показанного
+    комментария
+    Возвращает - (список комментариев, есть ли комментарии дальше)
+    '''
+    comments = list(get_post_pk_comments(pk, after)[:limit + 1])
+    return comments[:limit], len(comments) > limit
+
+
+def get_comments(profile: User,
+                 reader: Optional[User] = None) -> QuerySet[Comment]:
+    '''Отправляет запрос в БД формата:
+    Вход - profile: User, reader: кто смотрит страницу
     Возвращает QuerySet с комментариями- QuerySet[Comment]
+    Только комментарии к постам, видимым в ленте (правила get_posts),
+    и к собственным постам читателя.
     '''
-    return Comment.objects.filter(author=profile)
+    visible = Q(
+        post__pub_date__lte=publication_now(),
+        post__is_published=True,
+        post__category__is_published=True,
+    )
+    if reader is not None and reader.is_authenticated:
+        visible |= Q(post__author_id=reader.pk)
+    return (Comment.objects
+                   .select_related('post')
+                   .filter(visible, author=profile)
+                   .order_by('-created_at'))
 
 
 def queryset_annotate(querset: QuerySet[Post]) -> QuerySet[Post]:
-    '''Добавляет аннотацию для подсчета количества комментариев
+    '''Упорядочивает ленту постов. Количество комментариев хранится
+    в денормализованном поле Post.comment_count, поэтому агрегация
+    по таблице комментариев не требуется.
     '''
-    return (querset
-            .annotate(comment_count=Count('comment'))
-            .order_by('-pub_date')
-            )
+    return querset.order_by('-pub_date')
 
 
 def get_paginator(objects: QuerySet,
                   page_number: int,
-                  posts_on_page: int) -> Page:
+                  posts_on_page: int,
+                  count_key: Optional[str] = None) -> Page:
     '''Пагинатор:
-    Вход - objects: QuerySet
+    Вход - objects: QuerySet, count_key: ключ кеша количества объектов
     Возвращает - Page
     '''
-    paginator = Paginator(objects, posts_on_page)
+    paginator = CachedCountPaginator(objects, posts_on_page,
+                                     count_key=count_key)
     return paginator.get_page(page_number)
+
+
+def get_cursor_paginator(objects: QuerySet,
+                         cursor: Optional[str],
+                         posts_on_page: int) -> CursorPage:
+    '''Пагинатор по курсору (pub_date, id), не выполняющий COUNT:
+    Вход - objects: QuerySet, cursor: токен из ?cursor=
+    Возвращает - CursorPage
+    '''
+    return CursorPaginator(objects, posts_on_page).get_page(cursor)
+
+
+def get_image_gc_delay() -> int:
+    return getattr(settings, 'BLOG_IMAGE_GC_DELAY', DEFAULT_IMAGE_GC_DELAY)
+
+
+def delete_unused_image(name: str) -> bool:
+    '''Удаляет файл изображения и его уменьшенные копии, если на него
+    больше не ссылается ни один пост. Файлы в хранилище общие для
+    постов с одинаковым содержимым, поэтому число ссылок берётся из БД.
+    Файл, который загружали снова менее BLOG_IMAGE_GC_DELAY секунд
+    назад, не удаляется: пост, загрузивший его, мог ещё не быть
+    зафиксирован.
+    Возвращает True, если файл удалён.
+    '''
+    if not name or Post.objects.filter(image=name).exists():
+        return False
+    try:
+        modified = post_image_storage.get_modified_time(name)
+    except FileNotFoundError:
+        return False
+    if timezone.now() - modified < timedelta(seconds=get_image_gc_delay()):
+        return False
+    post_image_storage.delete(name)
+    delete_derivatives([name])
+    return True
@@ -0,0 +1,205 @@
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+from django.conf import settings
+from django.http import (Http404, HttpRequest, HttpResponse,
+                         StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MEDIA_MAX_AGE = 60 * 60
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+SENDFILE = 'x-sendfile'
+ACCEL_REDIRECT = 'x-accel-redirect'
+# Имена из blog.storage.ContentAddressedStorage и их производные.
+CONTENT_HASH_RE = re.compile(r'(^|/)[0-9a-f]{64}(\.w\d+)?\.\w+$')
+# Имена из ManifestStaticFilesStorage: style.3f2a9c1b7e4d.css
+MANIFEST_HASH_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class ByteRange(NamedTuple):
+    start: int
+    end: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+
+def parse_range(header: str, size: int) -> Optional[ByteRange]:
+    '''Разбирает заголовок Range с одним диапазоном байтов:
+    Вход - header: значение заголовка, size: размер файла
+    Возвращает - ByteRange или None, если заголовок не поддерживается
+    (несколько диапазонов, другие единицы) и файл отдаётся целиком.
+    Недостижимый диапазон вызывает ValueError.
+    '''
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return ByteRange(start, end)
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def read_range(path: Path, byte_range: ByteRange) -> Iterator[bytes]:
+    with open(path, 'rb') as file:
+        file.seek(byte_range.start)
+        remaining = byte_range.length
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def cache_control(immutable: bool, max_age: int) -> str:
+    if immutable:
+        return f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'public, max-age={max_age}'
+
+
+def resolve(root: Path, path: str) -> Path:
+    try:
+        full_path = Path(safe_join(root, path))
+    except ValueError:
+        raise Http404(path)
+    if not full_path.is_file():
+        raise Http404(path)
+    return full_path
+
+
+def serve_file(request: HttpRequest, full_path: Path, cache: str,
+               content_type: Optional[str] = None,
+               encoding: Optional[str] = None) -> HttpResponse:
+    '''Отдаёт файл с ETag, Last-Modified и Cache-Control, отвечает
+    304 на условные запросы и 206 на запросы одного диапазона байтов.
+    '''
+    stat = full_path.stat()
+    etag = file_etag(stat)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime),
+    )
+    if response is None:
+        byte_range = None
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if range_header and (if_range is None or if_range == etag):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+        if byte_range is None:
+            byte_range = ByteRange(0, stat.st_size - 1)
+            status = 200
+        else:
+            status = 206
+        if request.method == 'HEAD' or not stat.st_size:
+            response = HttpResponse(status=status)
+        else:
+            response = StreamingHttpResponse(
+                read_range(full_path, byte_range), status=status,
+            )
+        if status == 206:
+            response['Content-Range'] = (
+                f'bytes {byte_range.start}-{byte_range.end}/{stat.st_size}'
+            )
+        response['Content-Length'] = byte_range.length
+        response['Content-Type'] = (
+            content_type
+            or mimetypes.guess_type(full_path.name)[0]
+            or 'application/octet-stream'
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache
+    return response
+
+
+def sendfile_response(full_path: Path, path: str) -> Optional[HttpResponse]:
+    '''Передаёт отдачу файла веб-серверу, если это настроено в
+    BLOG_SENDFILE_BACKEND: Apache/lighttpd (X-Sendfile) получает путь
+    на диске, nginx (X-Accel-Redirect) - путь во внутреннем location
+    BLOG_SENDFILE_URL. Range и условные запросы обрабатывает сервер.
+    '''
+    backend = getattr(settings, 'BLOG_SENDFILE_BACKEND', None)
+    if backend is None:
+        return None
+    response = HttpResponse(content_type=(
+        mimetypes.guess_type(full_path.name)[0] or 'application/octet-stream'
+    ))
+    if backend == SENDFILE:
+        response['X-Sendfile'] = str(full_path)
+    elif backend == ACCEL_REDIRECT:
+        response['X-Accel-Redirect'] = (
+            settings.BLOG_SENDFILE_URL.rstrip('/') + '/' + path.lstrip('/')
+        )
+    else:
+        raise ValueError(f'Неизвестный BLOG_SENDFILE_BACKEND: {backend}')
+    return response
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    '''Отдаёт загруженные файлы из MEDIA_ROOT. Файлы с хешем
+    содержимого в имени кешируются браузером навсегда.
+    '''
+    full_path = resolve(Path(settings.MEDIA_ROOT), path)
+    cache = cache_control(
+        bool(CONTENT_HASH_RE.search(path)),
+        getattr(settings, 'BLOG_MEDIA_MAX_AGE', DEFAULT_MEDIA_MAX_AGE),
+    )
+    response = sendfile_response(full_path, path)
+    if response is None:
+        return serve_file(request, full_path, cache)
+    response['Cache-Control'] = cache
+    return response
+
+
+@require_safe
+def serve_static(request: HttpRequest, path: str) -> HttpResponse:
+    '''Отдаёт собранную статику из STATIC_ROOT, когда перед
+    приложением нет веб-сервера. Выбирает заранее сжатый вариант
+    (.br, .gz) по Accept-Encoding.
+    '''
+    root = Path(settings.STATIC_ROOT)
+    full_path = resolve(root, path)
+    cache = cache_control(bool(MANIFEST_HASH_RE.search(path)),
+                          DEFAULT_MEDIA_MAX_AGE)
+    accepted = request.headers.get('Accept-Encoding', '')
+    served_path, encoding = full_path, None
+    for name, suffix in ENCODINGS:
+        compressed = full_path.with_name(full_path.name + suffix)
+        if name in accepted and compressed.is_file():
+            served_path, encoding = compressed, name
+            break
+    response = serve_file(
+        request, served_path, cache,
+        content_type=mimetypes.guess_type(full_path.name)[0],
+        encoding=encoding,
+    )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
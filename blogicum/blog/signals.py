@@ -0,0 +1,193 @@
+from datetime import timedelta
+from django.db.models import F
+from django.db.models.functions import Greatest
+from typing import Union
+
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.contrib.auth import get_user_model
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog import tasks
+from blog.cache import bump_generation
+from blog.feeds import invalidate_feeds
+from blog.instrumentation import track_query
+from blog.jobs import enqueue
+from blog.middleware import invalidate_pages
+from blog.models import Category, Comment, Location, Post
+from blog.paginators import invalidate_post_counts
+from blog.routers import mark_sticky
+from blog.search import index_post, unindex_post
+from blog.services import get_image_gc_delay, invalidate_categories
+from blog.templatetags.blog_tags import POST_CARD_GENERATION
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance: Comment, created: bool,
+                            **kwargs) -> None:
+    '''Увеличивает счётчик комментариев поста при создании комментария
+    и версию обсуждения при создании и правке.
+    '''
+    changes = {'thread_version': F('thread_version') + 1}
+    if created:
+        changes['comment_count'] = F('comment_count') + 1
+    Post.objects.filter(pk=instance.post_id).update(**changes)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance: Comment, **kwargs) -> None:
+    '''Уменьшает счётчик комментариев поста при удалении комментария,
+    в том числе при каскадном удалении и удалении из админки, и
+    увеличивает версию обсуждения.
+    '''
+    Post.objects.filter(pk=instance.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        thread_version=F('thread_version') + 1,
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_post_counts(sender, **kwargs) -> None:
+    '''Сбрасывает закешированные количества постов в лентах.
+    '''
+    invalidate_post_counts()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_categories(sender, **kwargs) -> None:
+    '''Сбрасывает кеш категорий по слагу.
+    '''
+    invalidate_categories()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=User)
+def reset_rendered_posts(sender, update_fields=None, **kwargs) -> None:
+    '''Сбрасывает кеш карточек постов, страниц для анонимов и лент.
+    Вход пользователя обновляет только last_login и их не затрагивает.
+    '''
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_generation(POST_CARD_GENERATION)
+    invalidate_pages()
+    invalidate_feeds()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_pages(sender, **kwargs) -> None:
+    '''Сбрасывает кеш страниц для анонимов: в карточках выводится
+    число комментариев.
+    '''
+    invalidate_pages()
+
+
+@receiver(post_save, sender=Post)
+def build_image_derivatives(sender, instance: Post, **kwargs) -> None:
+    '''Ставит в очередь создание уменьшенных копий нового изображения
+    поста. Приёмник подключён раньше release_replaced_image и видит
+    прежнее имя файла.
+    '''
+    name = instance.image.name
+    if name and name != instance._saved_image_name:
+        enqueue(tasks.build_image_derivatives, {'name': name},
+                key=f'thumbnails:{name}')
+
+
+@receiver(post_init, sender=Post)
+def remember_image(sender, instance: Post, **kwargs) -> None:
+    '''Запоминает исходное имя изображения, чтобы после сохранения
+    понять, что пост перестал ссылаться на старый файл.
+    '''
+    image = instance.__dict__.get('image')
+    instance._saved_image_name = getattr(image, 'name', image)
+
+
+def collect_image_later(name: str) -> None:
+    # Сборка откладывается: файл может понадобиться посту, который
+    # загрузил то же изображение и ещё не зафиксирован.
+    enqueue(tasks.collect_unused_image, {'name': name},
+            key=f'image-gc:{name}', run_at=timezone.now() + timedelta(
+                seconds=get_image_gc_delay()
+            ))
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance: Post, **kwargs) -> None:
+    '''Удаляет заменённое изображение, если оно больше не используется.
+    '''
+    if 'image' not in instance.__dict__:
+        return
+    old_name = instance._saved_image_name
+    instance._saved_image_name = instance.image.name
+    if old_name and old_name != instance.image.name:
+        collect_image_later(old_name)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance: Post, **kwargs) -> None:
+    '''Удаляет изображение удалённого поста, если оно больше не
+    используется.
+    '''
+    if instance.image.name:
+        collect_image_later(instance.image.name)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection: BaseDatabaseWrapper,
+                     **kwargs) -> None:
+    '''Выполняет BLOG_SQLITE_PRAGMAS на новом подключении к SQLite.'''
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'BLOG_SQLITE_PRAGMAS',
+                                     {}).items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection: BaseDatabaseWrapper,
+                          **kwargs) -> None:
+    '''Подключает учёт SQL для InstrumentationMiddleware. Обёртка
+    ставится первой: execute_wrapper() снимает последнюю в списке.
+    '''
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, track_query)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def stick_author_to_primary(sender, instance: Union[Post, Comment],
+                            **kwargs) -> None:
+    '''Автор только что изменённого поста или комментария читает
+    с основной БД, чтобы сразу увидеть свои изменения.
+    '''
+    mark_sticky(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance: Post, update_fields=None,
+                        **kwargs) -> None:
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance: Post, **kwargs) -> None:
+    unindex_post(instance.pk)
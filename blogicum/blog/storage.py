@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import os
+import posixpath
+from typing import Iterator, Optional
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASH_CHUNK_SIZE = 64 * 1024
+COMPRESSIBLE_EXTENSIONS = frozenset((
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.html', '.xml', '.json',
+))
+# Сжатая копия сохраняется, только если она хотя бы на 5% меньше.
+MIN_COMPRESSION_RATIO = 0.95
+
+
+def file_digest(content: File) -> str:
+    '''SHA-256 содержимого файла, прочитанного по частям.'''
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name: str, digest: str) -> str:
+    '''post_images/photo.JPG -> post_images/<sha256>.jpg'''
+    directory = posixpath.dirname(name)
+    extension = posixpath.splitext(name)[1].lower()
+    return posixpath.join(directory, f'{digest}{extension}')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    '''Хранилище, в котором имя файла - хеш его содержимого.
+    Одинаковые файлы хранятся один раз и используются всеми постами,
+    которые их загрузили; удалением неиспользуемых файлов занимается
+    фоновая задача blog.tasks.collect_unused_image.
+    '''
+
+    def save(self, name: str, content: File,
+             max_length: Optional[int] = None) -> str:
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = hashed_name(name, file_digest(content))
+        if self.touch(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def touch(self, name: str) -> bool:
+        '''Обновляет время изменения файла: сборщик не удаляет файл,
+        который недавно загрузили снова, даже если ссылка нового поста
+        на него ещё не зафиксирована.
+        Возвращает - False, если файла нет
+        '''
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+
+post_image_storage = ContentAddressedStorage()
+
+
+def get_post_image_storage() -> ContentAddressedStorage:
+    return post_image_storage
+
+
+def compress_variants(content: bytes) -> dict[str, bytes]:
+    '''Сжатые варианты файла для отдачи с Content-Encoding:
+    Вход - content: исходные байты
+    Возвращает - {'.gz': ..., '.br': ...}; brotli - если установлен
+    '''
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    return {
+        suffix: compressed for suffix, compressed in variants.items()
+        if len(compressed) < len(content) * MIN_COMPRESSION_RATIO
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    '''Статика с хешем содержимого в имени (style.3f2a9c1b7e4d.css),
+    поэтому её можно кешировать навсегда. При collectstatic рядом с
+    каждым текстовым файлом кладутся .gz и .br, которые веб-сервер
+    (gzip_static, brotli_static) или blog.serving отдают без сжатия
+    на лету.
+    '''
+
+    def post_process(self, paths: dict, dry_run: bool = False,
+                     **options) -> Iterator:
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if posixpath.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                self.compress(name)
+
+    def compress(self, name: str) -> None:
+        with self.open(name) as original:
+            content = original.read()
+        for suffix, compressed in compress_variants(content).items():
+            self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
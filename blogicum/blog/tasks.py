@@ -0,0 +1,17 @@
+from blog.images import generate_derivatives
+from blog.jobs import task
+from blog.services import delete_unused_image
+
+
+@task(max_attempts=3, retry_delay=60)
+def build_image_derivatives(name: str) -> None:
+    '''Создаёт уменьшенные копии изображения поста. Пока задача не
+    выполнена, их при первом показе создаёт get_variants().
+    '''
+    generate_derivatives(name)
+
+
+@task(max_attempts=3, retry_delay=60)
+def collect_unused_image(name: str) -> None:
+    '''Удаляет изображение, на которое больше не ссылаются посты.'''
+    delete_unused_image(name)
@@ -0,0 +1,52 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.db.models.fields.files import ImageFieldFile
+from django.template.context import Context
+
+from blog.cache import get_generation
+from blog.images import WEBP, get_variants
+from blog.models import Post
+
+POST_CARD_GENERATION = 'post_card'
+GENERATION_ATTRIBUTE = '_post_card_generation'
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card_version(context: Context, post: Post) -> str:
+    '''Версия отрисованной карточки поста для ключа кеша фрагмента.
+    Поколение сбрасывается сигналами при изменении постов, категорий,
+    мест и пользователей; изменение числа комментариев меняет версию
+    само. Поколение читается из кеша один раз за запрос: {% include %}
+    изолирует render_context, поэтому оно хранится на request. Без
+    request - один раз на каждую отрисовку карточки.
+    '''
+    request = context.get('request')
+    store = context.render_context if request is None else vars(request)
+    if GENERATION_ATTRIBUTE not in store:
+        store[GENERATION_ATTRIBUTE] = get_generation(POST_CARD_GENERATION)
+    return f'{store[GENERATION_ATTRIBUTE]}.{post.comment_count}'
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(image: ImageFieldFile, css_class: str = '',
+               sizes: str = '40rem') -> dict[str, any]:
+    '''Изображение поста с уменьшенными копиями в srcset:
+    браузер выбирает WebP или обычную копию подходящей ширины.
+    '''
+    variants = get_variants(image.name)
+    srcsets = {}
+    for derivative in variants.derivatives:
+        srcsets.setdefault(derivative.format == WEBP, []).append(
+            f'{default_storage.url(derivative.name)} {derivative.width}w'
+        )
+    original = f'{image.url} {variants.width}w'
+    return {
+        'image': image,
+        'css_class': css_class,
+        'sizes': sizes,
+        'webp_srcset': ', '.join(srcsets.get(True, [])),
+        'srcset': ', '.join(srcsets[False] + [original])
+        if srcsets.get(False) else '',
+    }
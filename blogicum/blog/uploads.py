@@ -0,0 +1,176 @@
+import logging
+import time
+import tracemalloc
+from io import BytesIO
+from typing import Optional
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig, ValidationError
+from django.core.files.base import ContentFile, File
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (StopUpload,
+                                             TemporaryFileUploadHandler)
+from django.http import HttpRequest
+from django.template.defaultfilters import filesizeformat
+from django.utils.datastructures import MultiValueDict
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_IMAGE_MAX_PIXELS = 40_000_000
+
+
+def get_image_max_bytes() -> int:
+    return getattr(settings, 'BLOG_IMAGE_MAX_BYTES', DEFAULT_IMAGE_MAX_BYTES)
+
+
+def get_image_max_pixels() -> int:
+    return getattr(settings, 'BLOG_IMAGE_MAX_PIXELS',
+                   DEFAULT_IMAGE_MAX_PIXELS)
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    '''Пишет загружаемые файлы во временный файл на диске, а не в
+    память, и прерывает загрузку, как только файл превысил
+    BLOG_IMAGE_MAX_BYTES: остаток тела запроса не читается. Имя
+    прерванного файла запоминается в request.rejected_uploads, чтобы
+    форма сообщила об ошибке (см. restore_rejected_uploads).
+    '''
+
+    def handle_raw_input(self, input_data, META: dict, content_length: int,
+                         boundary: bytes, encoding: Optional[str] = None
+                         ) -> None:
+        self.request.rejected_uploads = {}
+        # Кроме файла в теле есть обычные поля, их объём ограничен
+        # DATA_UPLOAD_MAX_MEMORY_SIZE.
+        limit = get_image_max_bytes() + (
+            settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0
+        )
+        if content_length > limit:
+            # StopUpload здесь не перехватывается парсером; как и при
+            # превышении DATA_UPLOAD_MAX_MEMORY_SIZE, ответ - 400.
+            raise RequestDataTooBig(
+                'Тело запроса больше допустимого для загрузки изображения.'
+            )
+
+    def receive_data_chunk(self, raw_data: bytes,
+                           start: int) -> Optional[bytes]:
+        if start + len(raw_data) > get_image_max_bytes():
+            self.request.rejected_uploads[self.field_name] = self.file_name
+            raise StopUpload(connection_reset=True)
+        return super().receive_data_chunk(raw_data, start)
+
+
+class RejectedUpload(UploadedFile):
+    '''Пустой файл на месте прерванной загрузки; BoundedImageField
+    отклоняет его с ошибкой too_large.
+    '''
+    exceeds_limit = True
+
+    def __init__(self, name: str) -> None:
+        super().__init__(BytesIO(), name=name, size=0)
+
+
+def restore_rejected_uploads(request: HttpRequest,
+                             files: MultiValueDict) -> MultiValueDict:
+    '''Возвращает files с RejectedUpload на месте файлов, загрузку
+    которых прервал LimitedTemporaryFileUploadHandler.
+    '''
+    rejected = getattr(request, 'rejected_uploads', None)
+    if not rejected:
+        return files
+    files = files.copy()
+    for field_name, file_name in rejected.items():
+        files[field_name] = RejectedUpload(file_name)
+    return files
+
+
+class BoundedImageField(forms.ImageField):
+    '''Поле изображения, которое проверяет размер файла и число
+    пикселей по заголовку до того, как Pillow разбирает файл целиком.
+    '''
+    default_error_messages = {
+        'too_large': 'Файл слишком большой: допускается не более %(limit)s.',
+        'too_many_pixels': ('Изображение слишком большое: допускается не '
+                            'более %(limit)s мегапикселей.'),
+    }
+
+    def to_python(self,
+                  data: Optional[UploadedFile]) -> Optional[UploadedFile]:
+        if data in self.empty_values:
+            return super().to_python(data)
+        started = time.perf_counter()
+        tracing = not tracemalloc.is_tracing() and getattr(
+            settings, 'BLOG_UPLOAD_TRACE_MEMORY', False)
+        if tracing:
+            tracemalloc.start()
+        try:
+            self.check_limits(data)
+            return super().to_python(data)
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] if tracing else None
+            if tracing:
+                tracemalloc.stop()
+            logger.info(
+                'Проверка загрузки %s: %s байт, %.1f мс, пик памяти %s',
+                getattr(data, 'name', ''),
+                getattr(data, 'size', ''),
+                (time.perf_counter() - started) * 1000,
+                'не измерялся' if peak is None else f'{peak} байт',
+            )
+
+    def check_limits(self, data: UploadedFile) -> None:
+        max_bytes = get_image_max_bytes()
+        if getattr(data, 'exceeds_limit', False) or data.size > max_bytes:
+            raise ValidationError(
+                self.error_messages['too_large'],
+                code='too_large',
+                params={'limit': filesizeformat(max_bytes)},
+            )
+        max_pixels = get_image_max_pixels()
+        try:
+            # Image.open читает только заголовок, пиксели не декодируются.
+            with Image.open(data) as image:
+                width, height = image.size
+        except Exception as exc:
+            raise ValidationError(
+                self.error_messages['invalid_image'],
+                code='invalid_image',
+            ) from exc
+        finally:
+            data.seek(0)
+        if width * height > max_pixels:
+            raise ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={'limit': max_pixels // 1_000_000},
+            )
+
+
+def strip_image_metadata(upload: UploadedFile) -> File:
+    '''Перекодирует загруженное изображение без EXIF, применив
+    поворот из EXIF к пикселям. Цветовой профиль сохраняется.
+    Вызывается до сохранения: имя файла в хранилище - хеш содержимого,
+    и файл под таким именем больше не меняется.
+    Возвращает - новый файл, либо upload, если убирать нечего
+    '''
+    started = time.perf_counter()
+    upload.seek(0)
+    with Image.open(upload) as image:
+        image_format = image.format
+        if (image_format not in ('JPEG', 'PNG', 'WEBP')
+                or not image.info.get('exif')):
+            upload.seek(0)
+            return upload
+        image.load()
+        clean = ImageOps.exif_transpose(image)
+    options = {'exif': b'', 'icc_profile': clean.info.get('icc_profile')}
+    if image_format == 'JPEG':
+        options['quality'] = 90
+    buffer = BytesIO()
+    clean.save(buffer, format=image_format, **options)
+    logger.info('Метаданные удалены из %s за %.1f мс', upload.name,
+                (time.perf_counter() - started) * 1000)
+    return ContentFile(buffer.getvalue(), name=upload.name)
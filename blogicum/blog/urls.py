@@ -1,13 +1,24 @@
-from blog import views
+from blog import async_views, views
 from blog.apps import BlogConfig
+from blog.converters import FeedFormatConverter
+from blog.feeds import AuthorFeed, CategoryFeed
 
-from django.urls import path
+from django.conf import settings
+from django.urls import path, register_converter
 
 
 app_name = BlogConfig.name
 
+register_converter(FeedFormatConverter, 'feed_format')
+
+# Ленты и страница поста: под ASGI - асинхронные варианты.
+feed_views = async_views if settings.BLOG_ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', views.IndexView.as_view(), name='index'),
+    path('', feed_views.IndexView.as_view(), name='index'),
+    path('feed/<feed_format:feed_format>/',
+         views.FeedView.as_view(),
+         name='feed'),
     path('posts/<int:pk>/comment/',
          views.AddCommentView.as_view(),
          name='add_comment'),
@@ -25,15 +36,28 @@ urlpatterns = [
          views.PostDeleteView.as_view(),
          name='delete_post'),
     path('posts/<int:pk>/',
-         views.PostDetailView.as_view(),
+         feed_views.PostDetailView.as_view(),
          name='post_detail'),
+    path('posts/<int:pk>/comments/',
+         views.PostCommentsView.as_view(),
+         name='post_comments'),
     path('posts/edit/<int:pk>/',
          views.UserUpdateView.as_view(),
          name='edit_profile'),
     path('profile/<username>/',
-         views.ProfileView.as_view(),
+         feed_views.ProfileView.as_view(),
          name='profile'),
+    path('profile/<username>/feed/<feed_format:feed_format>/',
+         views.FeedView.as_view(feed_class=AuthorFeed),
+         name='author_feed'),
+    path('profile/<username>/comments/',
+         views.ProfileCommentsView.as_view(),
+         name='profile_comments'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('category/<slug:category_slug>/',
-         views.CategoryPostsView.as_view(),
+         feed_views.CategoryPostsView.as_view(),
          name='category_posts'),
+    path('category/<slug:category_slug>/feed/<feed_format:feed_format>/',
+         views.FeedView.as_view(feed_class=CategoryFeed),
+         name='category_feed'),
 ]
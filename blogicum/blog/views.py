@@ -1,24 +1,39 @@
 from django.views.generic import CreateView, DeleteView, UpdateView
 from django.views.generic import DetailView, ListView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import UserPassesTestMixin
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404, redirect, render
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.db.models import QuerySet
-from django.http import HttpResponse, HttpRequest
-from django.http import Http404
+from django.http import HttpResponse, HttpRequest, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.formats import date_format
+from django.utils.http import http_date, quote_etag
+from django.utils.timezone import localtime
 from django.forms import Form
 
 from blog.services import queryset_annotate, get_comments, get_posts_author
-from blog.services import get_posts, get_paginator, get_post_pk_comments
+from blog.services import get_posts, get_comments_chunk
+from blog.services import get_published_category, get_paginator
 from blog.forms import CommentForm, UserForm
 from blog.forms import PostForm
-from blog.models import Comment, Post, Category
-from blog.mixins import DispatchNeededMixin, CommentMixin
-from blog.mixins import PostMixin, PostModelMixin
+from blog.feeds import PostFeed, get_feed_state, render_feed
+from blog.instrumentation import get_aggregates, get_sample_rate
+from blog.search import search_posts
+from blog.models import Comment, Post
+from blog.mixins import ConditionalPostMixin, DispatchNeededMixin
+from blog.mixins import CommentMixin
+from blog.mixins import PostMixin, PostModelMixin, FeedPaginationMixin
+from blog.mixins import PAGINATION_CURSOR, ReplicaReadMixin
+from blog.mixins import RejectedUploadMixin
+from blog.paginators import CURSOR_AFTER, InvalidCursor
+from blog.paginators import decode_cursor, encode_cursor
+from blog.routers import read_from_replica
 
 
 AMOUNT_OBJ_ON_ONE_PAGE = 10
+AMOUNT_COMMENTS_ON_ONE_PAGE = 50
 
 
 class AddCommentView(LoginRequiredMixin, CommentMixin, CreateView):
@@ -69,60 +84,118 @@ class DeleteCommentView(DispatchNeededMixin, CommentMixin, DeleteView):
         return self.delete(request, *args, **kwargs)
 
 
-class IndexView(PostMixin, ListView):
+class IndexView(ReplicaReadMixin, FeedPaginationMixin, PostMixin,
+                ListView):
     template_name = 'blog/index.html'
-    queryset = queryset_annotate(get_posts())
+    pagination_mode = PAGINATION_CURSOR
+
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        return (self.get_legacy_page_redirect()
+                or super().get(request, *args, **kwargs))
+
+    def get_queryset(self) -> QuerySet[Post]:
+        return queryset_annotate(get_posts())
 
     def get_context_data(self, **kwargs) -> dict[str, any]:
         context = super().get_context_data(**kwargs)
-        context['page_obj'] = get_paginator(
-            objects=self.queryset,
-            page_number=self.request.GET.get('page'),
+        context['page_obj'] = self.paginate_feed(
+            objects=self.object_list,
             posts_on_page=AMOUNT_OBJ_ON_ONE_PAGE,
         )
         return context
 
 
-class PostDetailView(LoginRequiredMixin, DispatchNeededMixin, DetailView):
+class PostDetailView(ReplicaReadMixin, LoginRequiredMixin,
+                     ConditionalPostMixin, DispatchNeededMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
     context_object_name = 'post'
 
     def get_context_data(self, **kwargs) -> dict[str, any]:
         context = super().get_context_data(**kwargs)
+        comments, has_more = get_comments_chunk(
+            self.kwargs['pk'],
+            after=None,
+            limit=AMOUNT_COMMENTS_ON_ONE_PAGE,
+        )
         context['form'] = CommentForm()
-        context['comments'] = get_post_pk_comments(self.kwargs['pk'])
+        context['comments'] = comments
+        if has_more:
+            context['comments_more_url'] = get_comments_more_url(
+                self.kwargs['pk'], comments[-1]
+            )
         return context
 
 
-class CategoryPostsView(PostMixin, ListView):
+class PostCommentsView(LoginRequiredMixin, DispatchNeededMixin, View):
+    model = Post
+
+    def get(self, request: HttpRequest, pk: int) -> JsonResponse:
+        try:
+            _, created_at, comment_pk = decode_cursor(
+                request.GET.get('after', '')
+            )
+        except InvalidCursor:
+            after = None
+        else:
+            after = (created_at, comment_pk)
+        comments, has_more = get_comments_chunk(
+            pk,
+            after=after,
+            limit=AMOUNT_COMMENTS_ON_ONE_PAGE,
+        )
+        return JsonResponse({
+            'comments': [
+                serialize_comment(comment, request.user)
+                for comment in comments
+            ],
+            'next': (get_comments_more_url(pk, comments[-1])
+                     if has_more else None),
+        })
+
+
+def get_comments_more_url(pk: int, last: Comment) -> str:
+    after = encode_cursor(CURSOR_AFTER, last.created_at, last.pk)
+    return f"{reverse('blog:post_comments', kwargs={'pk': pk})}?after={after}"
+
+
+def serialize_comment(comment: Comment, user: User) -> dict[str, any]:
+    data = {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'author_url': reverse('blog:profile',
+                              kwargs={'username': comment.author.username}),
+        'created_at': date_format(
+            localtime(comment.created_at), 'DATETIME_FORMAT'),
+        'text': comment.text,
+    }
+    if comment.author_id == user.id:
+        data['edit_url'] = reverse(
+            'blog:edit_comment', args=(comment.post_id, comment.pk))
+        data['delete_url'] = reverse(
+            'blog:delete_comment', args=(comment.post_id, comment.pk))
+    return data
+
+
+class CategoryPostsView(ReplicaReadMixin, FeedPaginationMixin, PostMixin,
+                        ListView):
     template_name = 'blog/category.html'
 
     def get_queryset(self) -> QuerySet[Post]:
-        category_slug = self.kwargs['category_slug']
-        category = get_object_or_404(Category,
-                                     slug=category_slug,
-                                     is_published=True)
-        if not category.is_published:
-            raise Http404('Категория не опубликована')
-        return queryset_annotate(get_posts()).filter(category=category,)
+        self.category = get_published_category(self.kwargs['category_slug'])
+        return queryset_annotate(get_posts()).filter(category=self.category)
 
     def get_context_data(self, **kwargs) -> dict[str, any]:
         context = super().get_context_data(**kwargs)
-        category_slug = self.kwargs['category_slug']
-        category = get_object_or_404(Category,
-                                     slug=category_slug,
-                                     is_published=True)
-        context['page_obj'] = get_paginator(
-            objects=context['page_obj'],
-            page_number=self.request.GET.get('page'),
+        context['page_obj'] = self.paginate_feed(
+            objects=self.object_list,
             posts_on_page=AMOUNT_OBJ_ON_ONE_PAGE,
         )
-        context['category'] = category
+        context['category'] = self.category
         return context
 
 
-class ProfileView(View):
+class ProfileView(ReplicaReadMixin, FeedPaginationMixin, View):
     template_name = 'blog/profile.html'
 
     def get(self, request: HttpRequest, username: str) -> HttpResponse:
@@ -130,12 +203,26 @@ class ProfileView(View):
         posts = queryset_annotate(get_posts_author(profile))
         context = {
             'profile': profile,
-            'page_obj': get_paginator(
+            'page_obj': self.paginate_feed(
                 objects=posts,
+                posts_on_page=AMOUNT_OBJ_ON_ONE_PAGE,
+            ),
+        }
+        return render(request, self.template_name, context)
+
+
+class ProfileCommentsView(View):
+    template_name = 'blog/profile_comments.html'
+
+    def get(self, request: HttpRequest, username: str) -> HttpResponse:
+        profile = get_object_or_404(User, username=username)
+        context = {
+            'profile': profile,
+            'page_obj': get_paginator(
+                objects=get_comments(profile, request.user),
                 page_number=self.request.GET.get('page'),
                 posts_on_page=AMOUNT_OBJ_ON_ONE_PAGE,
             ),
-            'comments': get_comments(profile),
         }
         return render(request, self.template_name, context)
 
@@ -147,15 +234,17 @@ class UserUpdateView(LoginRequiredMixin, DispatchNeededMixin, UpdateView):
     template_name = 'registration/registration_form.html'
 
 
-class PostUpdateView(LoginRequiredMixin, UpdateView):
+class PostUpdateView(LoginRequiredMixin, DispatchNeededMixin,
+                     RejectedUploadMixin, UpdateView):
     model = Post
     form_class = PostForm
     template_name = 'blog/create.html'
     pk_url_kwarg = 'post_id'
 
     def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
-        instance = get_object_or_404(self.model, id=self.kwargs['post_id'])
-        if instance.author != request.user:
+        self.checked_object = get_object_or_404(self.model,
+                                                id=self.kwargs['post_id'])
+        if self.checked_object.author_id != request.user.id:
             return redirect('blog:post_detail', pk=self.kwargs['post_id'])
         return super().dispatch(request, *args, **kwargs)
 
@@ -182,3 +271,59 @@ class PostDeleteView(DispatchNeededMixin,
     success_url = reverse_lazy('blog:index')
     pk_url_kwarg = 'post_id'
     model = Post
+
+
+class InstrumentationView(UserPassesTestMixin, View):
+    '''Средние показатели InstrumentationMiddleware по представлениям,
+    только для персонала.
+    '''
+    raise_exception = True
+
+    def test_func(self) -> bool:
+        return self.request.user.is_staff
+
+    def get(self, request: HttpRequest) -> JsonResponse:
+        return JsonResponse({
+            'sample_rate': get_sample_rate(),
+            'views': get_aggregates(),
+        })
+
+
+class SearchView(ReplicaReadMixin, View):
+    template_name = 'blog/search.html'
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        query = request.GET.get('q', '').strip()
+        page = search_posts(query, request.GET.get('after'),
+                            AMOUNT_OBJ_ON_ONE_PAGE)
+        return render(request, self.template_name, {
+            'query': query,
+            'posts': page.posts,
+            'next_cursor': page.next_cursor,
+        })
+
+
+class FeedView(View):
+    '''RSS или Atom для лент. Условный запрос (If-None-Match,
+    If-Modified-Since) получает 304 по закешированным валидаторам,
+    до выборки постов.
+    '''
+    feed_class = PostFeed
+
+    def get(self, request: HttpRequest, feed_format: str,
+            **kwargs) -> HttpResponse:
+        feed = self.feed_class(feed_format)
+        with read_from_replica(request.user):
+            state = get_feed_state(request, feed, **kwargs)
+            last_modified = (int(state.newest.timestamp())
+                             if state.newest else None)
+            etag = quote_etag(state.etag)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified,
+            )
+            if response is None:
+                response = render_feed(request, feed, state, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+# Under ASGI feeds and post pages use the async views (blog.async_views).
+os.environ.setdefault('BLOGICUM_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
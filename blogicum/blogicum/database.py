@@ -0,0 +1,107 @@
+import os
+from pathlib import Path
+from typing import Mapping
+
+SQLITE = 'sqlite'
+POSTGRESQL = 'postgresql'
+ENGINES = {
+    SQLITE: 'django.db.backends.sqlite3',
+    POSTGRESQL: 'django.db.backends.postgresql',
+}
+DEFAULT_CONN_MAX_AGE = 60
+# Сколько секунд SQLite ждёт снятия блокировки записи, прежде чем
+# ответить "database is locked".
+DEFAULT_SQLITE_TIMEOUT = 20
+# PRAGMA, которые blog.signals.configure_sqlite выполняет на каждом
+# новом подключении. WAL позволяет читать во время записи, NORMAL
+# в режиме WAL не теряет целостность при сбое процесса.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': str(256 * 1024 * 1024),
+    'cache_size': str(-64 * 1024),
+    'temp_store': 'MEMORY',
+}
+
+
+def _flag(environ: Mapping[str, str], name: str, default: bool) -> bool:
+    value = environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_config(base_dir: Path,
+                    environ: Mapping[str, str] = os.environ) -> dict:
+    '''Настройки подключения default из переменных окружения:
+    Вход - base_dir: каталог проекта для файла SQLite,
+    environ: переменные окружения BLOGICUM_DB_*
+    Возвращает - словарь для DATABASES['default']
+    BLOGICUM_DB_ENGINE выбирает sqlite (по умолчанию) или postgresql;
+    BLOGICUM_DB_TUNING=0 возвращает настройки Django по умолчанию,
+    чтобы сравнить их с настроенным профилем.
+    '''
+    engine = environ.get('BLOGICUM_DB_ENGINE', SQLITE)
+    if engine not in ENGINES:
+        raise ValueError(f'Неизвестный BLOGICUM_DB_ENGINE: {engine}')
+    tuned = _flag(environ, 'BLOGICUM_DB_TUNING', True)
+    config = {
+        'ENGINE': ENGINES[engine],
+        'CONN_MAX_AGE': int(environ.get(
+            'BLOGICUM_DB_CONN_MAX_AGE', DEFAULT_CONN_MAX_AGE if tuned else 0,
+        )),
+    }
+    if engine == SQLITE:
+        config['NAME'] = environ.get('BLOGICUM_DB_NAME',
+                                     base_dir / 'db.sqlite3')
+        if tuned:
+            config['OPTIONS'] = {'timeout': int(environ.get(
+                'BLOGICUM_DB_TIMEOUT', DEFAULT_SQLITE_TIMEOUT,
+            ))}
+        return config
+    config.update({
+        'NAME': environ.get('BLOGICUM_DB_NAME', 'blogicum'),
+        'USER': environ.get('BLOGICUM_DB_USER', 'blogicum'),
+        'PASSWORD': environ.get('BLOGICUM_DB_PASSWORD', ''),
+        'HOST': environ.get('BLOGICUM_DB_HOST', 'localhost'),
+        'PORT': environ.get('BLOGICUM_DB_PORT', '5432'),
+        # За pgbouncer в режиме transaction серверные курсоры
+        # не переживают конец транзакции.
+        'DISABLE_SERVER_SIDE_CURSORS': _flag(
+            environ, 'BLOGICUM_DB_PGBOUNCER', False),
+    })
+    if tuned:
+        config['OPTIONS'] = {
+            'connect_timeout': 5,
+            'options': '-c statement_timeout={}'.format(
+                environ.get('BLOGICUM_DB_STATEMENT_TIMEOUT', 5000)
+            ),
+        }
+    return config
+
+
+def replica_configs(base_dir: Path,
+                    environ: Mapping[str, str] = os.environ) -> dict:
+    '''Подключения к репликам из BLOGICUM_DB_REPLICAS - списка через
+    запятую: пути к файлам SQLite или хосты PostgreSQL.
+    Возвращает - {'replica_1': {...}, ...}; в тестах реплики
+    подменяются основной БД (TEST MIRROR).
+    '''
+    primary = database_config(base_dir, environ)
+    replicas = {}
+    names = [name.strip()
+             for name in environ.get('BLOGICUM_DB_REPLICAS', '').split(',')
+             if name.strip()]
+    for number, name in enumerate(names, start=1):
+        config = dict(primary, TEST={'MIRROR': 'default'})
+        config['NAME' if primary['ENGINE'] == ENGINES[SQLITE]
+               else 'HOST'] = name
+        replicas[f'replica_{number}'] = config
+    return replicas
+
+
+def sqlite_pragmas(environ: Mapping[str, str] = os.environ
+                   ) -> dict[str, str]:
+    if not _flag(environ, 'BLOGICUM_DB_TUNING', True):
+        return {}
+    return dict(SQLITE_PRAGMAS)
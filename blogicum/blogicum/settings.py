@@ -1,5 +1,9 @@
+import os
 from pathlib import Path
 
+from blogicum.database import (database_config, replica_configs,
+                               sqlite_pragmas)
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -28,11 +32,11 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'blog.apps.BlogConfig',
-    'debug_toolbar',
     'django_bootstrap5',
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,16 +44,25 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'blog.middleware.AnonymousPageCacheMiddleware',
 ]
 
+# The debug toolbar is for local development only; production
+# visibility comes from blog.middleware.InstrumentationMiddleware.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('blog.middleware.AnonymousPageCacheMiddleware'),
+        'debug_toolbar.middleware.DebugToolbarMiddleware',
+    )
+
 ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blog.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,13 +82,23 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Engine, persistent connections and timeouts come from BLOGICUM_DB_*
+# environment variables, see blogicum/database.py.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
+    **replica_configs(BASE_DIR),
 }
 
+# Read-only views read from these aliases; writes go to default.
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+BLOG_REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+
+# After a write the author reads from default for this many seconds.
+BLOG_REPLICA_STICKY_SECONDS = 15
+
+# PRAGMAs run on every new SQLite connection (WAL, mmap, cache size).
+BLOG_SQLITE_PRAGMAS = sqlite_pragmas()
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -119,6 +142,15 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+STATIC_ROOT = BASE_DIR / 'static_root'
+
+# Without DEBUG collectstatic writes hashed names plus .gz/.br copies.
+if not DEBUG:
+    STATICFILES_STORAGE = 'blog.storage.CompressedManifestStaticFilesStorage'
+
+# Serve STATIC_ROOT from Django when no web server sits in front of it.
+BLOG_SERVE_STATIC = False
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -132,10 +164,92 @@ INTERNAL_IPS = [
 
 LOGIN_URL = 'login'
 
+MEDIA_URL = '/media/'
+
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Browser cache lifetime (seconds) for media files without a content hash.
+BLOG_MEDIA_MAX_AGE = 60 * 60
+
+# Hand media files to the web server: None, 'x-sendfile' or
+# 'x-accel-redirect' (nginx internal location BLOG_SENDFILE_URL).
+BLOG_SENDFILE_BACKEND = None
+BLOG_SENDFILE_URL = '/protected-media/'
+
+FILE_UPLOAD_HANDLERS = [
+    'blog.uploads.LimitedTemporaryFileUploadHandler',
+]
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 LOGIN_REDIRECT_URL = 'blog:index'
+
+# Interval (seconds) the publication clock rounds "now" down to.
+BLOG_PUBLICATION_BUCKET = 30
+
+# Lifetime (seconds) of cached post counts for numbered pagination.
+BLOG_PAGE_COUNT_TIMEOUT = 60
+
+# Serve feeds and post pages with the async views from blog.async_views.
+# blogicum/asgi.py turns this on through BLOGICUM_ASYNC_VIEWS.
+BLOG_ASYNC_VIEWS = os.environ.get('BLOGICUM_ASYNC_VIEWS') == '1'
+
+# Threads (and database connections) the async views run queries on.
+BLOG_ASYNC_QUERY_WORKERS = 8
+
+# Views whose full responses are cached for anonymous visitors.
+BLOG_PAGE_CACHE_VIEWS = [
+    'blog:index',
+    'blog:category_posts',
+    'blog:profile',
+    'pages:about',
+    'pages:rules',
+]
+
+# Upper bound (seconds) for the anonymous page cache lifetime.
+BLOG_PAGE_CACHE_TIMEOUT = 300
+
+# Posts per RSS/Atom feed and the upper bound (seconds) for caching its XML.
+BLOG_FEED_ITEMS = 20
+BLOG_FEED_CACHE_TIMEOUT = 60 * 60
+
+# Limits for uploaded post images, checked before the image is decoded.
+BLOG_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+BLOG_IMAGE_MAX_PIXELS = 40_000_000
+
+# Seconds an unreferenced post image is kept after its last upload
+# before the background collector deletes it.
+BLOG_IMAGE_GC_DELAY = 60 * 60
+
+# Trace peak Python memory while validating uploads (adds overhead).
+BLOG_UPLOAD_TRACE_MEMORY = False
+
+# Share of requests measured by InstrumentationMiddleware (0 disables it).
+BLOG_INSTRUMENTATION_SAMPLE_RATE = 0.01
+
+# Add the Server-Timing header to measured responses.
+BLOG_INSTRUMENTATION_SERVER_TIMING = True
+
+# Background jobs (blog.jobs, run by manage.py run_worker): seconds a worker
+# may hold a job before another one takes it over, and how long finished
+# jobs are kept.
+BLOG_JOB_LEASE = 5 * 60
+BLOG_JOB_RETENTION = 60 * 60 * 24 * 7
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'blog': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
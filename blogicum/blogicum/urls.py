@@ -1,12 +1,16 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 from django.views.generic.edit import CreateView
 
+from blog.serving import serve_media, serve_static
+from blog.views import InstrumentationView
+
 
 urlpatterns = [
+    path('admin/instrumentation/', InstrumentationView.as_view(),
+         name='instrumentation'),
     path('admin/', admin.site.urls),
     path('', include('blog.urls', namespace='blog')),
     path('pages/', include('pages.urls', namespace='pages')),
@@ -20,6 +24,8 @@ urlpatterns = [
         ),
         name='registration',
     ),
+    re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'),
+            serve_media, name='media'),
 ]
 
 handler404 = 'pages.views.page_not_found'
@@ -28,6 +34,8 @@ handler500 = 'pages.views.internal_server_error'
 if settings.DEBUG:
     import debug_toolbar
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT
-                          )
+elif settings.BLOG_SERVE_STATIC:
+    urlpatterns += (
+        re_path(r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'),
+                serve_static, name='static'),
+    )
@@ -0,0 +1,95 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import Http404
+from django.test import Client, RequestFactory
+from django.urls import resolve, reverse
+
+from blog import async_views
+from blog.benchmark import Dataset, drive_asgi, drive_wsgi, seed_dataset
+from blog.concurrency import gather_sync
+
+
+@pytest.fixture(autouse=True)
+def disable_page_cache(settings):
+    settings.BLOG_PAGE_CACHE_VIEWS = []
+    cache.clear()
+
+
+def call_view(path, user):
+    request = RequestFactory().get(path)
+    request.user = user
+    request.resolver_match = resolve(request.path)
+    view = getattr(async_views,
+                   request.resolver_match.func.view_class.__name__)
+    return async_to_sync(view.as_view())(
+        request, **request.resolver_match.kwargs)
+
+
+@pytest.mark.django_db
+def test_async_views_render_like_sync_ones(settings, user, mixer,
+                                           post_with_published_location):
+    # Без пула запросы идут в потоке теста и видят его транзакцию.
+    settings.BLOG_ASYNC_QUERY_WORKERS = 0
+    post = post_with_published_location
+    mixer.cycle(3).blend('blog.Comment', post=post)
+    urls = [
+        reverse('blog:index'),
+        reverse('blog:category_posts', args=(post.category.slug,)),
+        reverse('blog:profile', args=(post.author.username,)),
+        reverse('blog:post_detail', args=(post.pk,)),
+    ]
+    for url in urls:
+        response = call_view(url, user)
+        assert response.status_code == HTTPStatus.OK, url
+        assert post.title in response.content.decode(), (
+            f'Убедитесь, что асинхронное представление `{url}` '
+            'показывает те же посты, что синхронное.'
+        )
+    page = call_view(f'{urls[1]}?page=100', user)
+    assert post.title in page.content.decode(), (
+        'Убедитесь, что номер за пределами ленты даёт последнюю страницу.'
+    )
+    assert call_view(urls[3], AnonymousUser()).status_code == HTTPStatus.FOUND
+    with pytest.raises(Http404):
+        call_view(reverse('blog:category_posts', args=('no-such',)), user)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_queries_run_concurrently(settings):
+    settings.BLOG_ASYNC_QUERY_WORKERS = 2
+    barrier = threading.Barrier(2, timeout=5)
+    # При последовательном выполнении барьер не дождётся второго вызова.
+    assert async_to_sync(gather_sync)(barrier.wait, barrier.wait), (
+        'Убедитесь, что независимые запросы выполняются одновременно.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_server_drivers(settings):
+    settings.DEBUG = False
+    settings.MIDDLEWARE = [name for name in settings.MIDDLEWARE
+                           if not name.startswith('debug_toolbar.')]
+    seeded = seed_dataset(Dataset(users=3, categories=2, locations=2,
+                                  posts=5, comments=6))
+    client = Client()
+    client.force_login(seeded.user)
+    cookies = f'sessionid={client.cookies["sessionid"].value}'
+    urls = [reverse('blog:index'),
+            reverse('blog:post_detail', args=(seeded.post.pk,))]
+    wsgi = drive_wsgi(WSGIHandler(), urls, requests=6, concurrency=3,
+                      threads=2, cookies=cookies)
+    asgi = async_to_sync(drive_asgi)(ASGIHandler(), urls, requests=6,
+                                     concurrency=3, cookies=cookies)
+    for result in (wsgi, asgi):
+        assert result.requests == 6 and result.errors == 0, (
+            f'Убедитесь, что нагрузка через {result.interface} проходит '
+            'без ошибок.'
+        )
+        assert result.rps > 0 and result.p50 <= result.p95
@@ -0,0 +1,28 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+
+from blog.benchmark import Dataset, collect_urls, measure_url, seed_dataset
+
+
+@pytest.fixture(autouse=True)
+def disable_page_cache(settings):
+    settings.BLOG_PAGE_CACHE_VIEWS = []
+
+
+@pytest.mark.django_db
+def test_benchmark_covers_every_view():
+    seeded = seed_dataset(Dataset(users=3, categories=2, locations=2,
+                                  posts=5, comments=6))
+    client = Client()
+    client.force_login(seeded.user)
+    urls = dict(collect_urls(seeded))
+    assert {'blog:index', 'blog:edit_comment', 'pages:rules'} <= set(urls)
+    for name, url in urls.items():
+        measurement = measure_url(client, name, url, requests=2, warmup=0)
+        assert measurement.status == HTTPStatus.OK, (
+            f'Убедитесь, что засеянных данных достаточно для `{name}`.'
+        )
+        assert measurement.p50 <= measurement.p95 <= measurement.p99
+        assert measurement.queries > 0 and measurement.rss_kb > 0
@@ -0,0 +1,36 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(mixer, user):
+    post = mixer.blend('blog.Post', author=user)
+    comments = mixer.cycle(3).blend('blog.Comment', post=post, author=user)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что при создании комментария увеличивается счётчик '
+        '`comment_count` публикации.'
+    )
+    comments[0].delete()
+    Comment.objects.filter(pk=comments[1].pk).delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        'Убедитесь, что при удалении комментария уменьшается счётчик '
+        '`comment_count` публикации.'
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(mixer, user):
+    posts = mixer.cycle(3).blend('blog.Post', author=user)
+    mixer.cycle(2).blend('blog.Comment', post=posts[0], author=user)
+    Post.objects.update(comment_count=7)
+    call_command('recount_comments', batch_size=2)
+    assert list(
+        Post.objects.order_by('pk').values_list('comment_count', flat=True)
+    ) == [2, 0, 0], (
+        'Убедитесь, что команда `recount_comments` восстанавливает '
+        'счётчики комментариев.'
+    )
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pytest
+from django.db import connection
+
+from blogicum.database import database_config, sqlite_pragmas
+
+
+def test_sqlite_profile_by_default():
+    config = database_config(Path('/srv'), {})
+    assert config['ENGINE'] == 'django.db.backends.sqlite3'
+    assert config['NAME'] == Path('/srv/db.sqlite3')
+    assert config['CONN_MAX_AGE'] > 0, (
+        'Убедитесь, что по умолчанию подключения к БД переиспользуются.'
+    )
+    assert config['OPTIONS']['timeout'] > 0
+    assert sqlite_pragmas({})['journal_mode'] == 'WAL'
+
+
+def test_postgresql_profile():
+    config = database_config(Path('/srv'), {
+        'BLOGICUM_DB_ENGINE': 'postgresql',
+        'BLOGICUM_DB_HOST': 'db',
+        'BLOGICUM_DB_PGBOUNCER': '1',
+    })
+    assert config['ENGINE'] == 'django.db.backends.postgresql'
+    assert config['HOST'] == 'db'
+    assert config['DISABLE_SERVER_SIDE_CURSORS'] is True
+    assert 'statement_timeout' in config['OPTIONS']['options']
+
+
+def test_tuning_can_be_disabled():
+    environ = {'BLOGICUM_DB_TUNING': '0'}
+    config = database_config(Path('/srv'), environ)
+    assert config['CONN_MAX_AGE'] == 0 and 'OPTIONS' not in config
+    assert sqlite_pragmas(environ) == {}
+    with pytest.raises(ValueError):
+        database_config(Path('/srv'), {'BLOGICUM_DB_ENGINE': 'oracle'})
+
+
+@pytest.mark.django_db
+def test_pragmas_applied_on_connect():
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        synchronous = cursor.fetchone()[0]
+    assert synchronous == 1, (
+        'Убедитесь, что на каждом подключении к SQLite выполняются '
+        'PRAGMA из BLOG_SQLITE_PRAGMAS (synchronous=NORMAL).'
+    )
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog.models import Post
+
+
+@pytest.fixture
+def posts(user, published_category):
+    cache.clear()
+
+    def make(title, **kwargs):
+        fields = dict(author=user, category=published_category,
+                      is_published=True, text='Текст',
+                      pub_date=timezone.now() - timedelta(days=1))
+        fields.update(kwargs)
+        return Post.objects.create(title=title, **fields)
+
+    return make
+
+
+@pytest.mark.django_db
+def test_feeds_show_only_visible_posts(client, user, published_category,
+                                       posts):
+    posts('Видимый пост')
+    posts('Черновик', is_published=False)
+    posts('Отложенный', pub_date=timezone.now() + timedelta(days=1))
+    urls = (
+        '/feed/rss/',
+        '/feed/atom/',
+        f'/category/{published_category.slug}/feed/atom/',
+        f'/profile/{user.username}/feed/rss/',
+    )
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, url
+        content = response.content.decode()
+        assert 'Видимый пост' in content, (
+            f'Убедитесь, что лента `{url}` содержит опубликованные посты.'
+        )
+        assert 'Черновик' not in content and 'Отложенный' not in content, (
+            f'Убедитесь, что лента `{url}` скрывает неопубликованные посты.'
+        )
+    assert 'atom' in client.get('/feed/atom/')['Content-Type']
+    assert client.get('/category/no-such/feed/rss/').status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+
+
+@pytest.mark.django_db
+def test_conditional_get_skips_queries(client, posts,
+                                       django_assert_num_queries):
+    post = posts('Первый')
+    response = client.get('/feed/atom/')
+    etag = response['ETag']
+    last_modified = response['Last-Modified']
+    with django_assert_num_queries(0):
+        response = client.get('/feed/atom/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        'Убедитесь, что лента отвечает 304 по ETag без запросов к БД.'
+    )
+    with django_assert_num_queries(0):
+        response = client.get('/feed/atom/',
+                              HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    with django_assert_num_queries(0):
+        assert client.get('/feed/atom/').status_code == HTTPStatus.OK, (
+            'Убедитесь, что XML ленты берётся из кеша.'
+        )
+    post.title = 'Исправленный'
+    post.save()
+    response = client.get('/feed/atom/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        'Убедитесь, что правка поста меняет ETag ленты.'
+    )
+    assert 'Исправленный' in response.content.decode()
+    etag = response['ETag']
+    posts('Второй', pub_date=timezone.now() - timedelta(hours=1))
+    response = client.get('/feed/atom/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag and 'Второй' in response.content.decode()
@@ -0,0 +1,74 @@
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.jobs import claim_job, run_job
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_THUMBNAIL_WIDTHS = (320, 640)
+    cache.clear()
+    return tmp_path
+
+
+def make_jpeg(width: int, height: int) -> SimpleUploadedFile:
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), 'teal').save(buffer, format='JPEG')
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(),
+                              content_type='image/jpeg')
+
+
+@pytest.mark.django_db
+def test_derivatives_are_built_on_upload(media_root, mixer, user,
+                                         user_client, published_category,
+                                         django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        post = mixer.blend('blog.Post', author=user, is_published=True,
+                           category=published_category,
+                           image=make_jpeg(800, 400))
+    stem = Path(post.image.name).stem
+    assert not list((media_root / 'post_images').glob('*.w*')), (
+        'Убедитесь, что уменьшенные копии создаются в фоновой задаче, '
+        'а не при сохранении поста.'
+    )
+    assert run_job(claim_job('test')), (
+        'Убедитесь, что загрузка изображения ставит в очередь задачу '
+        'создания уменьшенных копий.'
+    )
+    assert claim_job('test') is None
+    derivatives = sorted(path.name for path in
+                         (media_root / 'post_images').glob('*.w*'))
+    assert derivatives == [
+        f'{stem}.w320.jpg', f'{stem}.w320.webp',
+        f'{stem}.w640.jpg', f'{stem}.w640.webp',
+    ], (
+        'Убедитесь, что при загрузке изображения создаются уменьшенные '
+        'копии в форматах JPEG и WebP.'
+    )
+    with Image.open(media_root / 'post_images' / derivatives[1]) as image:
+        assert image.size == (320, 160)
+    content = user_client.get(f'/posts/{post.id}/').content.decode()
+    assert (f'{stem}.w320.webp 320w' in content
+            and f'{stem}.jpg 800w' in content), (
+        'Убедитесь, что изображение поста выводится с атрибутом srcset.'
+    )
+
+
+@pytest.mark.django_db
+def test_build_thumbnails_backfills_existing_images(media_root, mixer, user):
+    mixer.blend('blog.Post', author=user, image=make_jpeg(700, 700))
+    for path in (media_root / 'post_images').glob('*.w*'):
+        path.unlink()
+    cache.clear()
+    call_command('build_thumbnails', processes=2)
+    assert len(list((media_root / 'post_images').glob('*.w*'))) == 4, (
+        'Убедитесь, что команда `build_thumbnails` создаёт недостающие '
+        'уменьшенные копии.'
+    )
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client
+from django.urls import resolve
+
+from blog.instrumentation import get_aggregates
+from blog.middleware import InstrumentationMiddleware
+
+
+@pytest.fixture(autouse=True)
+def measure_every_request(settings):
+    settings.BLOG_PAGE_CACHE_VIEWS = []
+    settings.BLOG_INSTRUMENTATION_SAMPLE_RATE = 1
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_server_timing_and_aggregates(user_client):
+    response = user_client.get('/')
+    header = response.get('Server-Timing', '')
+    assert 'sql;dur=' in header and 'total;dur=' in header, (
+        'Убедитесь, что замеренный ответ содержит заголовок Server-Timing.'
+    )
+    index = get_aggregates()['blog:index']
+    assert index['requests'] == 1
+    assert index['sql_count'] > 0 and index['template_ms'] > 0, (
+        'Убедитесь, что учитываются SQL-запросы и отрисовка шаблонов.'
+    )
+    assert index['total_ms'] >= index['template_ms']
+
+
+@pytest.mark.django_db
+def test_disabled_instrumentation(settings):
+    settings.BLOG_INSTRUMENTATION_SAMPLE_RATE = 0
+    response = Client().get('/')
+    assert 'Server-Timing' not in response, (
+        'Убедитесь, что при нулевой доле замеров middleware отключается.'
+    )
+    assert get_aggregates() == {}
+
+
+@pytest.mark.django_db
+def test_instrumentation_endpoint_is_staff_only(user, user_client):
+    url = '/admin/instrumentation/'
+    assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+        'Убедитесь, что показатели доступны только персоналу.'
+    )
+    user.is_staff = True
+    user.save()
+    response = user_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'blog:index' not in response.json()['views']
+    user_client.get('/')
+    assert 'blog:index' in user_client.get(url).json()['views']
+
+
+def test_async_path_records_off_the_event_loop(monkeypatch, rf):
+    threads = []
+    monkeypatch.setattr(
+        'blog.middleware.record',
+        lambda view_name, metrics: threads.append(threading.get_ident()),
+    )
+
+    async def get_response(request):
+        return HttpResponse()
+
+    async def call():
+        request = rf.get('/')
+        request.resolver_match = resolve('/')
+        await InstrumentationMiddleware(get_response)(request)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(call())
+    assert threads and threads[0] != loop_thread, (
+        'Убедитесь, что асинхронный путь записывает замер в кеш вне '
+        'цикла событий.'
+    )
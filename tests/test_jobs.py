@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from blog.jobs import claim_job, enqueue, run_job, task
+from blog.models import Job
+
+calls = []
+
+
+@task(max_attempts=2, retry_delay=10)
+def record(value: int) -> None:
+    calls.append(value)
+
+
+@task(max_attempts=2, retry_delay=10)
+def explode() -> None:
+    raise ValueError('сбой')
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+def test_enqueue_waits_for_commit_and_dedupes(
+        django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        enqueue(record, {'value': 1}, key='record')
+        assert not Job.objects.exists(), (
+            'Убедитесь, что задача ставится в очередь только после '
+            'фиксации транзакции.'
+        )
+        enqueue(record, {'value': 2}, key='record')
+        enqueue(record, {'value': 3})
+    assert sorted(Job.objects.values_list('payload', flat=True),
+                  key=str) == [{'value': 1}, {'value': 3}], (
+        'Убедитесь, что незавершённая задача с тем же ключом '
+        'повторно не ставится.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                enqueue(record, {'value': 4})
+                raise RuntimeError
+    assert Job.objects.count() == 2
+    with pytest.raises(ValueError):
+        enqueue(len)
+
+
+@pytest.mark.django_db
+def test_claim_respects_schedule_and_lease():
+    now = timezone.now()
+    later = Job.objects.create(task=record.task_name, payload={'value': 1},
+                               run_at=now + timedelta(hours=1),
+                               max_attempts=2)
+    job = claim_job('first')
+    assert job is None, (
+        'Убедитесь, что задача не выполняется раньше run_at.'
+    )
+    Job.objects.filter(pk=later.pk).update(run_at=now)
+    job = claim_job('first')
+    assert job.pk == later.pk and job.locked_by == 'first'
+    assert claim_job('second') is None, (
+        'Убедитесь, что захваченную задачу не забирает другой обработчик.'
+    )
+    Job.objects.filter(pk=job.pk).update(
+        locked_until=now - timedelta(seconds=1)
+    )
+    stolen = claim_job('second')
+    assert stolen.pk == job.pk and stolen.attempts == 2, (
+        'Убедитесь, что задачу с истёкшей арендой забирает другой '
+        'обработчик.'
+    )
+    assert not run_job(job), (
+        'Убедитесь, что обработчик с истёкшей арендой не записывает '
+        'результат.'
+    )
+    assert run_job(stolen) and calls == [1, 1]
+    stolen.refresh_from_db()
+    assert stolen.status == Job.Status.DONE and not stolen.locked_by
+
+
+@pytest.mark.django_db
+def test_failed_job_is_retried_with_backoff():
+    Job.objects.create(task=explode.task_name, run_at=timezone.now(),
+                       max_attempts=2)
+    assert not run_job(claim_job('worker'))
+    job = Job.objects.get()
+    assert job.status == Job.Status.PENDING and 'сбой' in job.last_error
+    assert job.run_at > timezone.now() + timedelta(seconds=5), (
+        'Убедитесь, что упавшая задача повторяется после паузы.'
+    )
+    job.run_at = timezone.now()
+    job.save()
+    assert not run_job(claim_job('worker'))
+    job.refresh_from_db()
+    assert job.status == Job.Status.FAILED and job.attempts == 2, (
+        'Убедитесь, что после последней попытки задача помечается '
+        'не выполненной.'
+    )
+    assert claim_job('worker') is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_worker_drains_queue():
+    for value in range(3):
+        enqueue(record, {'value': value}, key=f'record:{value}')
+    call_command('run_worker', burst=True)
+    assert sorted(calls) == [0, 1, 2], (
+        'Убедитесь, что `run_worker --burst` выполняет все готовые задачи.'
+    )
+    assert set(Job.objects.values_list('status', flat=True)) == {
+        Job.Status.DONE
+    }
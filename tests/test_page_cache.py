@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.middleware import get_page_cache_timeout
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(mixer, user, client, user_client,
+                                    published_category,
+                                    django_assert_num_queries):
+    post = mixer.blend('blog.Post', author=user, is_published=True,
+                       category=published_category)
+    client.get('/')
+    with django_assert_num_queries(0):
+        assert post.title in client.get('/').content.decode(), (
+            'Убедитесь, что главная страница для анонимов берётся из кеша.'
+        )
+    client.get('/pages/about/')
+    with django_assert_num_queries(0):
+        client.get('/pages/about/')
+    new_post = mixer.blend('blog.Post', author=user, is_published=True,
+                           category=published_category)
+    assert new_post.title in client.get('/').content.decode(), (
+        'Убедитесь, что кеш страниц сбрасывается при создании поста.'
+    )
+    assert user.username in user_client.get('/').content.decode(), (
+        'Убедитесь, что авторизованные пользователи не получают '
+        'закешированную для анонимов страницу.'
+    )
+
+
+@pytest.mark.django_db
+def test_page_cache_expires_before_scheduled_post(settings, mixer, user):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 300
+    settings.BLOG_PUBLICATION_BUCKET = 30
+    assert get_page_cache_timeout() == 300
+    mixer.blend('blog.Post', author=user, is_published=True,
+                pub_date=timezone.now() + timedelta(seconds=45))
+    assert get_page_cache_timeout() <= 45 + 30, (
+        'Убедитесь, что время жизни кеша страниц не превышает времени до '
+        'ближайшей отложенной публикации.'
+    )
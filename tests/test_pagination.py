@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+import pytz
+
+from blog.models import Post
+from blog.services import get_cursor_paginator
+from conftest import N_PER_PAGE
+
+
+@pytest.fixture
+def same_date_posts(mixer, user, published_category):
+    pub_date = datetime(2020, 1, 1, tzinfo=pytz.UTC)
+    return mixer.cycle(N_PER_PAGE * 2 + 3).blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=(pub_date - timedelta(hours=i // 2)
+                  for i in range(N_PER_PAGE * 2 + 3)),
+    )
+
+
+@pytest.mark.django_db
+def test_cursor_pages_cover_feed_without_gaps(same_date_posts):
+    queryset = Post.objects.all()
+    expected = list(queryset.order_by('-pub_date', '-pk'))
+    seen = []
+    page = get_cursor_paginator(queryset, None, N_PER_PAGE)
+    seen.extend(page)
+    while page.has_next():
+        page = get_cursor_paginator(queryset, page.next_cursor, N_PER_PAGE)
+        seen.extend(page)
+    assert seen == expected, (
+        'Убедитесь, что курсорная пагинация выводит все публикации '
+        'ровно один раз и в порядке убывания даты.'
+    )
+    page = get_cursor_paginator(queryset, page.previous_cursor, N_PER_PAGE)
+    assert list(page) == expected[N_PER_PAGE:N_PER_PAGE * 2], (
+        'Убедитесь, что ссылка на предыдущую страницу курсорной пагинации '
+        'ведёт на предыдущую страницу.'
+    )
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_skips_count(same_date_posts,
+                                       client, django_assert_num_queries):
+    page = get_cursor_paginator(Post.objects.all(), None, N_PER_PAGE)
+    with django_assert_num_queries(1):
+        list(get_cursor_paginator(
+            Post.objects.all(), page.next_cursor, N_PER_PAGE))
+    response = client.get('/?cursor=broken')
+    assert len(response.context['page_obj']) == N_PER_PAGE, (
+        'Убедитесь, что повреждённый курсор открывает первую страницу ленты.'
+    )
+
+
+@pytest.mark.django_db
+def test_legacy_page_links_redirect_to_cursor_feed(same_date_posts, client):
+    response = client.get('/?page=5')
+    assert response.status_code == HTTPStatus.FOUND, (
+        'Убедитесь, что ссылка ?page= на ленту с курсорной пагинацией '
+        'перенаправляет на её первую страницу.'
+    )
+    assert response['Location'] == '/'
+    response = client.get('/?page=2&utm_source=rss')
+    assert response['Location'] == '/?utm_source=rss', (
+        'Убедитесь, что при перенаправлении сохраняются остальные '
+        'параметры запроса.'
+    )
+
+
+@pytest.mark.django_db
+def test_numbered_pagination_caches_count(same_date_posts, mixer, user,
+                                          published_category,
+                                          django_assert_num_queries):
+    from blog.services import get_paginator
+
+    def count_for_page():
+        return get_paginator(
+            Post.objects.all(), 2, N_PER_PAGE, count_key='test'
+        ).paginator.count
+
+    total = count_for_page()
+    with django_assert_num_queries(0):
+        assert count_for_page() == total, (
+            'Убедитесь, что количество публикаций берётся из кеша.'
+        )
+    mixer.blend('blog.Post', author=user, category=published_category)
+    assert count_for_page() == total + 1, (
+        'Убедитесь, что кеш количества публикаций сбрасывается при '
+        'создании публикации.'
+    )
+
+
+@pytest.mark.django_db
+def test_numbered_pagination_renders_elided_range(mixer, user, client,
+                                                  published_category):
+    mixer.cycle(N_PER_PAGE * 12).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True,
+    )
+    content = client.get(
+        f'/category/{published_category.slug}/?page=6'
+    ).content.decode()
+    assert '…' in content and '?page=3"' not in content, (
+        'Убедитесь, что пагинатор выводит сокращённый список страниц.'
+    )
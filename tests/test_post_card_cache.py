@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+
+from blog.cache import get_generation
+from blog.models import Post
+from blog.templatetags import blog_tags
+
+
+@pytest.mark.django_db
+def test_post_card_fragment_is_cached_and_invalidated(
+        mixer, user, client, published_category, published_location):
+    post = mixer.blend(
+        'blog.Post', author=user, is_published=True, title='Старый',
+        category=published_category, location=published_location,
+    )
+    assert 'Старый' in client.get('/').content.decode()
+    Post.objects.filter(pk=post.pk).update(title='Без сигнала')
+    assert 'Старый' in client.get('/').content.decode(), (
+        'Убедитесь, что карточка поста берётся из кеша фрагментов.'
+    )
+    post.refresh_from_db()
+    post.title = 'Новый'
+    post.save()
+    assert 'Новый' in client.get('/').content.decode(), (
+        'Убедитесь, что кеш карточки сбрасывается при сохранении поста.'
+    )
+    published_location.name = 'Новое место'
+    published_location.save()
+    assert 'Новое место' in client.get('/').content.decode(), (
+        'Убедитесь, что кеш карточки сбрасывается при изменении места.'
+    )
+    mixer.blend('blog.Comment', post=post, author=user)
+    assert 'Комментарии (1)' in client.get('/').content.decode(), (
+        'Убедитесь, что кеш карточки учитывает число комментариев.'
+    )
+
+
+@pytest.mark.django_db
+def test_card_generation_is_read_once_per_page(
+        monkeypatch, mixer, user, user_client, published_category):
+    mixer.cycle(3).blend('blog.Post', author=user, is_published=True,
+                         category=published_category)
+    calls = []
+
+    def counting_generation(name):
+        calls.append(name)
+        return get_generation(name)
+
+    monkeypatch.setattr(blog_tags, 'get_generation', counting_generation)
+    assert user_client.get('/').status_code == HTTPStatus.OK
+    assert calls == [blog_tags.POST_CARD_GENERATION], (
+        'Убедитесь, что поколение карточек читается из кеша один раз '
+        'за отрисовку страницы, а не для каждой карточки.'
+    )
@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+
+from blog.models import Comment
+
+
+@pytest.fixture
+def detail_url(post_with_published_location):
+    return f'/posts/{post_with_published_location.pk}/'
+
+
+def get_etag(client, url):
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert 'private' in response['Cache-Control']
+    return response['ETag']
+
+
+@pytest.mark.django_db
+def test_unchanged_post_is_not_modified(user_client, another_user_client,
+                                        detail_url,
+                                        django_assert_max_num_queries):
+    etag = get_etag(user_client, detail_url)
+    # Сессия и пользователь, затем одна выборка версии поста.
+    with django_assert_max_num_queries(3):
+        response = user_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        'Убедитесь, что неизменённая страница поста отвечает 304.'
+    )
+    assert response['ETag'] == etag
+    response = another_user_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        'Убедитесь, что ETag страницы поста зависит от пользователя.'
+    )
+
+
+@pytest.mark.django_db
+def test_changes_refresh_etag(user_client, user, detail_url,
+                              post_with_published_location):
+    post = post_with_published_location
+    steps = (
+        lambda: Comment.objects.create(post=post, author=user, text='Раз'),
+        lambda: Comment.objects.filter(post=post).first().save(),
+        lambda: Comment.objects.filter(post=post).first().delete(),
+        lambda: post.save(),
+    )
+    for number, step in enumerate(steps):
+        etag = get_etag(user_client, detail_url)
+        step()
+        response = user_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Убедитесь, что правки поста и его комментариев меняют ETag '
+            f'страницы поста (шаг {number}).'
+        )
+        assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_hidden_post_is_never_not_modified(another_user_client, detail_url,
+                                           post_with_published_location):
+    etag = get_etag(another_user_client, detail_url)
+    post_with_published_location.is_published = False
+    post_with_published_location.save()
+    response = another_user_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что снятый с публикации пост не отдаётся по ETag '
+        'другим пользователям.'
+    )
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+import pytz
+from django.test import override_settings
+
+from blog.clock import publication_now
+
+FROZEN_NOW = datetime(2023, 7, 1, 12, 0, 47, 123456, tzinfo=pytz.UTC)
+
+
+@pytest.fixture(autouse=True)
+def disable_page_cache(settings):
+    settings.BLOG_PAGE_CACHE_VIEWS = []
+
+
+@override_settings(BLOG_PUBLICATION_BUCKET=30)
+def test_publication_now_rounds_down_to_bucket():
+    with mock.patch('blog.clock.timezone.now', return_value=FROZEN_NOW):
+        assert publication_now() == FROZEN_NOW.replace(
+            second=30, microsecond=0), (
+            'Убедитесь, что часы публикации округляют текущее время вниз '
+            'до границы интервала.'
+        )
+
+
+@pytest.mark.django_db
+@override_settings(BLOG_PUBLICATION_BUCKET=30)
+def test_scheduled_post_appears_within_bucket(mixer, user, client):
+    post = mixer.blend(
+        'blog.Post',
+        author=user,
+        category__is_published=True,
+        is_published=True,
+        pub_date=FROZEN_NOW + timedelta(seconds=20),
+    )
+    with mock.patch('blog.clock.timezone.now', return_value=FROZEN_NOW):
+        assert post not in client.get('/').context['page_obj'], (
+            'Убедитесь, что отложенная публикация не видна до её даты.'
+        )
+    later = FROZEN_NOW + timedelta(seconds=60)
+    with mock.patch('blog.clock.timezone.now', return_value=later):
+        assert post in client.get('/').context['page_obj'], (
+            'Убедитесь, что отложенная публикация появляется в ленте '
+            'без перезапуска сервера.'
+        )
@@ -0,0 +1,188 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Comment
+
+# Сессия и пользователь авторизованного клиента.
+AUTH_QUERIES = 2
+
+
+@pytest.fixture(autouse=True)
+def disable_page_cache(settings):
+    settings.BLOG_PAGE_CACHE_VIEWS = []
+
+
+@pytest.fixture
+def own_post(mixer, user, published_category, published_location):
+    return mixer.blend(
+        'blog.Post', author=user, is_published=True,
+        category=published_category, location=published_location,
+    )
+
+
+@pytest.fixture
+def own_comment(mixer, user, own_post):
+    return mixer.blend('blog.Comment', post=own_post, author=user)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('url', 'extra_queries'),
+    [
+        # пост + комментарии с авторами
+        ('/posts/{post.id}/', 2),
+        # пост + местоположения и категории в форме
+        ('/posts/{post.id}/edit/', 3),
+        ('/posts/{post.id}/delete/', 1),
+        ('/posts/{post.id}/edit_comment/{comment.id}/', 1),
+        ('/posts/{post.id}/delete_comment/{comment.id}/', 1),
+        ('/posts/edit/{user.id}/', 1),
+    ],
+    ids=['post_detail', 'edit_post', 'delete_post',
+         'edit_comment', 'delete_comment', 'edit_profile'],
+)
+def test_object_is_fetched_once(url, extra_queries, user, user_client,
+                                own_post, own_comment,
+                                django_assert_num_queries):
+    url = url.format(post=own_post, comment=own_comment, user=user)
+    with django_assert_num_queries(AUTH_QUERIES + extra_queries):
+        response = user_client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Убедитесь, что страница `{url}` доступна автору.'
+    )
+
+
+@pytest.mark.django_db
+def test_category_feed_queries(mixer, client, published_category,
+                               django_assert_num_queries):
+    mixer.cycle(15).blend(
+        'blog.Post', is_published=True, category=published_category,
+    )
+    url = f'/category/{published_category.slug}/'
+    # категория + COUNT + страница постов
+    with django_assert_num_queries(3):
+        client.get(url)
+    # категория и количество постов берутся из кеша
+    with django_assert_num_queries(1):
+        response = client.get(url + '?page=2')
+    assert response.context['category'] == published_category, (
+        'Убедитесь, что в контекст страницы категории передаётся категория.'
+    )
+    published_category.is_published = False
+    published_category.save()
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что снятая с публикации категория недоступна сразу '
+        'после изменения.'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n_items', [1, 12])
+def test_profile_queries_do_not_grow(n_items, mixer, user, client,
+                                     published_category,
+                                     django_assert_num_queries):
+    posts = mixer.cycle(n_items).blend(
+        'blog.Post', author=user, is_published=True,
+        category=published_category,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    mixer.cycle(n_items).blend(
+        'blog.Comment', author=user, post=(post for post in posts),
+    )
+    # пользователь + COUNT + страница постов
+    with django_assert_num_queries(3):
+        client.get(f'/profile/{user.username}/')
+    # пользователь + COUNT + страница комментариев с постами
+    with django_assert_num_queries(3):
+        response = client.get(f'/profile/{user.username}/comments/')
+    assert len(response.context['page_obj']) == min(n_items, 10), (
+        'Убедитесь, что комментарии пользователя выводятся постранично.'
+    )
+
+
+@pytest.mark.django_db
+def test_profile_comments_hide_posts_reader_cannot_see(
+        mixer, user, another_user, client, another_user_client,
+        published_category):
+    hidden_category = mixer.blend('blog.Category', is_published=False)
+    hidden_posts = [
+        mixer.blend('blog.Post', author=another_user, is_published=False,
+                    category=published_category, title='Снят с публикации'),
+        mixer.blend('blog.Post', author=another_user, is_published=True,
+                    category=published_category, title='Отложенный',
+                    pub_date=timezone.now() + timedelta(days=1)),
+        mixer.blend('blog.Post', author=another_user, is_published=True,
+                    category=hidden_category, title='Скрытая категория'),
+    ]
+    visible_post = mixer.blend(
+        'blog.Post', author=another_user, is_published=True,
+        category=published_category, title='Опубликован',
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    for post in (*hidden_posts, visible_post):
+        mixer.blend('blog.Comment', post=post, author=user)
+    url = f'/profile/{user.username}/comments/'
+    response = client.get(url)
+    content = response.content.decode('utf-8')
+    assert [comment.post for comment in response.context['page_obj']] == [
+        visible_post
+    ] and all(post.title not in content for post in hidden_posts), (
+        'Убедитесь, что на странице комментариев пользователя не видны '
+        'комментарии к неопубликованным, отложенным постам и постам из '
+        'снятых с публикации категорий.'
+    )
+    response = another_user_client.get(url)
+    assert len(response.context['page_obj']) == 4, (
+        'Убедитесь, что автор поста видит комментарии к своим постам, '
+        'даже если пост скрыт из ленты.'
+    )
+
+
+@pytest.mark.django_db
+def test_post_comments_are_loaded_in_bounded_chunks(
+        mixer, user, user_client, own_post, django_assert_num_queries):
+    mixer.cycle(60).blend(
+        'blog.Comment', post=own_post, author=mixer.blend('auth.User'),
+    )
+    with django_assert_num_queries(AUTH_QUERIES + 2):
+        response = user_client.get(f'/posts/{own_post.id}/')
+    assert len(response.context['comments']) == 50, (
+        'Убедитесь, что на странице поста выводится ограниченное число '
+        'комментариев.'
+    )
+    more_url = response.context['comments_more_url']
+    with django_assert_num_queries(AUTH_QUERIES + 2):
+        data = user_client.get(more_url).json()
+    assert len(data['comments']) == 10 and data['next'] is None, (
+        'Убедитесь, что оставшиеся комментарии отдаются в формате JSON.'
+    )
+
+
+@pytest.mark.django_db
+def test_comment_chunks_follow_thread_order(mixer, user, user_client,
+                                            own_post):
+    comments = mixer.cycle(60).blend('blog.Comment', post=own_post,
+                                     author=user)
+    # Порядок created_at расходится с порядком id, есть совпадения.
+    start = timezone.now()
+    for number, comment in enumerate(comments):
+        Comment.objects.filter(pk=comment.pk).update(
+            created_at=start - timedelta(seconds=number // 2)
+        )
+    expected = list(Comment.objects.filter(post=own_post).order_by(
+        'created_at', 'pk',
+    ).values_list('pk', flat=True))
+    response = user_client.get(f'/posts/{own_post.id}/')
+    shown = [comment.pk for comment in response.context['comments']]
+    more_url = response.context['comments_more_url']
+    while more_url:
+        data = user_client.get(more_url).json()
+        shown += [comment['id'] for comment in data['comments']]
+        more_url = data['next']
+    assert shown == expected, (
+        'Убедитесь, что подгрузка комментариев порциями не пропускает и '
+        'не повторяет комментарии.'
+    )
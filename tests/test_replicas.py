@@ -0,0 +1,64 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+
+from blog.models import Comment, Post
+from blog.routers import ReplicaRouter, read_from_replica
+
+
+@pytest.fixture
+def replica(settings):
+    settings.BLOG_REPLICA_DATABASES = ['replica_1']
+    settings.BLOG_PAGE_CACHE_VIEWS = []
+    cache.clear()
+    return 'replica_1'
+
+
+@pytest.mark.django_db
+def test_reads_go_to_replica_until_author_writes(
+        user, post_with_published_location, replica):
+    post = post_with_published_location
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) is None
+    with read_from_replica(user) as alias:
+        assert alias == replica
+        assert router.db_for_read(Post) == replica
+    assert router.db_for_write(Post) == 'default'
+    Comment.objects.create(post=post, author=user, text='Текст')
+    with read_from_replica(user) as alias:
+        assert alias is None, (
+            'Убедитесь, что после записи автор читает с основной БД.'
+        )
+    with read_from_replica(AnonymousUser()) as alias:
+        assert alias == replica
+    assert not router.allow_migrate(replica, 'blog'), (
+        'Убедитесь, что миграции не применяются к репликам.'
+    )
+
+
+@pytest.mark.django_db
+def test_read_only_views_use_replica(
+        settings, monkeypatch, user_client, post_with_published_location):
+    post = post_with_published_location
+    # Реплику подменяет сама основная БД: важен только выбор роутера.
+    settings.BLOG_REPLICA_DATABASES = ['default']
+    settings.BLOG_PAGE_CACHE_VIEWS = []
+    cache.clear()
+    routed = []
+    original = ReplicaRouter.db_for_read
+
+    def spy(self, model, **hints):
+        alias = original(self, model, **hints)
+        routed.append(alias)
+        return alias
+
+    monkeypatch.setattr(ReplicaRouter, 'db_for_read', spy)
+    user_client.get('/')
+    assert 'default' in routed, (
+        'Убедитесь, что главная страница читает данные с реплики.'
+    )
+    routed.clear()
+    user_client.get(f'/posts/{post.pk}/comment/')
+    assert 'default' not in routed, (
+        'Убедитесь, что остальные представления читают с основной БД.'
+    )
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog.models import Post
+from blog.search import rebuild_index, search_posts
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    # Транзакционные тесты очищают таблицы через flush, который не
+    # знает о виртуальной таблице индекса.
+    rebuild_index()
+    cache.clear()
+
+    def make(title, text, **kwargs):
+        fields = dict(author=user, category=published_category,
+                      is_published=True,
+                      pub_date=timezone.now() - timedelta(days=1))
+        fields.update(kwargs)
+        return Post.objects.create(title=title, text=text, **fields)
+
+    return make
+
+
+@pytest.mark.django_db
+def test_search_ranks_title_matches_and_hides_unpublished(posts):
+    in_text = posts('Заметки', 'Сегодня видели котов на крыше.')
+    in_title = posts('Коты и крыши', 'Про погоду.')
+    posts('Коты в черновике', 'Текст', is_published=False)
+    posts('Коты из будущего', 'Текст',
+          pub_date=timezone.now() + timedelta(days=1))
+    page = search_posts('кот', None, 10)
+    assert [post.pk for post in page.posts] == [in_title.pk, in_text.pk], (
+        'Убедитесь, что поиск находит слова по началу, ставит совпадения '
+        'в заголовке выше и не показывает скрытые посты.'
+    )
+    assert page.next_cursor is None
+    assert '<mark>Коты</mark>' in page.posts[0].search_title
+    assert '<mark>котов</mark>' in page.posts[1].search_snippet
+
+
+@pytest.mark.django_db
+def test_search_escapes_html_and_pages_by_cursor(posts):
+    posts('<b>Кот</b>', 'Текст')
+    for number in range(4):
+        posts(f'Заметка {number}', 'Про кота.')
+    page = search_posts('кот', None, 2)
+    assert '&lt;b&gt;<mark>Кот</mark>&lt;/b&gt;' in page.posts[0].search_title
+    seen = [post.pk for post in page.posts]
+    while page.next_cursor:
+        page = search_posts('кот', page.next_cursor, 2)
+        seen += [post.pk for post in page.posts]
+    assert len(seen) == len(set(seen)) == 5, (
+        'Убедитесь, что курсор проходит все результаты без повторов.'
+    )
+    assert search_posts('кот', 'мусор', 2).posts, (
+        'Убедитесь, что неверный курсор не приводит к ошибке.'
+    )
+
+
+@pytest.mark.django_db
+def test_index_follows_edits_and_deletes(posts):
+    post = posts('Черновик', 'Про собак.')
+    assert not search_posts('кот', None, 10).posts
+    post.text = 'Про котов.'
+    post.save()
+    assert [hit.pk for hit in search_posts('кот', None, 10).posts] == [
+        post.pk
+    ], 'Убедитесь, что индекс обновляется при сохранении поста.'
+    post.delete()
+    assert not search_posts('кот', None, 10).posts, (
+        'Убедитесь, что удалённый пост пропадает из индекса.'
+    )
+
+
+@pytest.mark.django_db
+def test_search_page_and_admin(client, admin_client, posts):
+    post = posts('Коты', 'Текст')
+    posts('Собаки', 'Текст')
+    response = client.get('/search/', {'q': 'кот'})
+    assert response.status_code == 200
+    assert [hit.pk for hit in response.context['posts']] == [post.pk]
+    response = admin_client.get('/admin/blog/post/', {'q': 'кот'})
+    assert list(response.context['cl'].queryset) == [post], (
+        'Убедитесь, что поиск в админке использует полнотекстовый индекс.'
+    )
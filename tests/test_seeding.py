@@ -0,0 +1,53 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+
+from blog.models import Comment, Post
+from blog.seeding import SeedPlan, seed_blog
+
+
+@pytest.mark.django_db(transaction=True)
+def test_seed_blog_command_rebuilds_counters():
+    call_command('seed_blog', users=5, categories=3, locations=2,
+                 posts=40, comments=120, batch_size=16, drop_indexes=True)
+    assert Post.objects.count() == 40 and Comment.objects.count() == 120
+    assert Post.objects.aggregate(total=Sum('comment_count'))['total'] == 120
+    post = Post.objects.order_by('-comment_count').first()
+    assert post.comment_count == Comment.objects.filter(post=post).count(), (
+        'Убедитесь, что после загрузки `seed_blog` пересчитывает '
+        'Post.comment_count.'
+    )
+    call_command('seed_blog', users=2, categories=1, locations=1,
+                 posts=5, comments=5)
+    assert Post.objects.count() == 45, (
+        'Убедитесь, что повторный запуск добавляет данные к уже '
+        'существующим.'
+    )
+
+
+@pytest.mark.django_db
+def test_seed_is_deterministic():
+    plan = SeedPlan(users=2, categories=2, locations=2, posts=10,
+                    comments=10)
+    seed_blog(plan, seed=7)
+    first = list(Post.objects.order_by('pk')
+                 .values_list('title', 'is_published'))
+    Post.objects.all().delete()
+    seed_blog(plan, seed=7)
+    second = list(Post.objects.order_by('pk')
+                  .values_list('title', 'is_published'))
+    assert first == second, (
+        'Убедитесь, что одинаковое зерно даёт одинаковые данные.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_regular_inserts_work_after_seed(django_user_model):
+    seed_blog(SeedPlan(users=3, categories=1, locations=1, posts=3,
+                       comments=3))
+    last_pk = django_user_model.objects.order_by('-pk').first().pk
+    user = django_user_model.objects.create(username='after_seed')
+    assert user.pk > last_pk, (
+        'Убедитесь, что после загрузки с явными pk последовательности '
+        'ключей сдвигаются и обычная вставка не получает занятый ключ.'
+    )
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from blog.serving import parse_range
+
+
+@pytest.fixture
+def media_file(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / 'post_images').mkdir()
+    name = f'post_images/{"a" * 64}.txt'
+    (tmp_path / name).write_bytes(b'0123456789')
+    return name
+
+
+def test_parse_range():
+    assert parse_range('bytes=2-5', 10) == (2, 5)
+    assert parse_range('bytes=-3', 10) == (7, 9)
+    assert parse_range('bytes=8-', 10) == (8, 9)
+    assert parse_range('bytes=0-1,4-5', 10) is None, (
+        'Убедитесь, что при нескольких диапазонах файл отдаётся целиком.'
+    )
+    with pytest.raises(ValueError):
+        parse_range('bytes=20-', 10)
+
+
+@pytest.mark.django_db
+def test_media_conditional_and_range(client, media_file):
+    url = f'/media/{media_file}'
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert b''.join(response.streaming_content) == b'0123456789'
+    assert 'immutable' in response['Cache-Control'], (
+        'Убедитесь, что файлы с хешем содержимого в имени кешируются '
+        'навсегда.'
+    )
+    etag = response['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        'Убедитесь, что на запрос с совпадающим ETag возвращается 304.'
+    )
+    response = client.get(url, HTTP_RANGE='bytes=2-4')
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT
+    assert response['Content-Range'] == 'bytes 2-4/10'
+    assert b''.join(response.streaming_content) == b'234'
+    response = client.get(url, HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"x"')
+    assert response.status_code == HTTPStatus.OK, (
+        'Убедитесь, что при устаревшем If-Range файл отдаётся целиком.'
+    )
+    response = client.get(url, HTTP_RANGE='bytes=50-')
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+    response = client.get('/media/post_images/missing.txt')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_media_sendfile(client, settings, media_file):
+    settings.BLOG_SENDFILE_BACKEND = 'x-accel-redirect'
+    response = client.get(f'/media/{media_file}')
+    assert response['X-Accel-Redirect'] == (
+        f'/protected-media/{media_file}'
+    ), 'Убедитесь, что отдача файла передаётся nginx через X-Accel-Redirect.'
+    assert not response.content
+
+
+def test_collectstatic_hashes_and_compresses(settings, tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    (source / 'site.css').write_text('body { color: red; }\n' * 100)
+    settings.STATICFILES_DIRS = [source]
+    settings.STATIC_ROOT = tmp_path / 'root'
+    settings.STATICFILES_STORAGE = (
+        'blog.storage.CompressedManifestStaticFilesStorage'
+    )
+    call_command('collectstatic', interactive=False, verbosity=0)
+    names = {path.name for path in (tmp_path / 'root').iterdir()}
+    hashed = [name for name in names
+              if name.startswith('site.') and name.endswith('.css')
+              and name != 'site.css']
+    assert hashed and f'{hashed[0]}.gz' in names, (
+        'Убедитесь, что collectstatic создаёт файлы с хешем в имени и '
+        'сжатые копии .gz.'
+    )
@@ -0,0 +1,115 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog.cache import get_generation
+from blog.jobs import claim_job, run_job
+from blog.models import Post
+from blog.services import delete_unused_image
+from blog.storage import post_image_storage
+from blog.templatetags.blog_tags import POST_CARD_GENERATION
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.BLOG_IMAGE_GC_DELAY = 0
+    return tmp_path
+
+
+def run_ready_jobs() -> None:
+    while (job := claim_job('test')) is not None:
+        run_job(job)
+
+
+def make_upload(color: str, name: str = 'image.png') -> SimpleUploadedFile:
+    buffer = BytesIO()
+    Image.new('RGB', (10, 10), color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@pytest.mark.django_db
+def test_identical_images_are_stored_once_and_collected(
+        media_root, mixer, user, django_capture_on_commit_callbacks):
+    first, second = mixer.cycle(2).blend(
+        'blog.Post', author=user,
+        image=(make_upload('red') for _ in range(2)),
+    )
+    assert first.image.name == second.image.name, (
+        'Убедитесь, что одинаковые изображения хранятся в одном файле.'
+    )
+    stored = media_root / first.image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    run_ready_jobs()
+    assert stored.exists(), (
+        'Убедитесь, что файл, на который ссылаются другие посты, '
+        'не удаляется.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        second.image = make_upload('blue')
+        second.save()
+    assert stored.exists(), (
+        'Убедитесь, что неиспользуемый файл удаляется фоновой задачей, '
+        'а не при сохранении поста.'
+    )
+    run_ready_jobs()
+    assert not stored.exists(), (
+        'Убедитесь, что неиспользуемый файл удаляется после замены '
+        'изображения.'
+    )
+
+
+@pytest.mark.django_db
+def test_recently_uploaded_image_is_kept(media_root, settings, mixer, user):
+    post = mixer.blend('blog.Post', author=user, image=make_upload('red'))
+    name = post.image.name
+    Post.objects.filter(pk=post.pk).update(image='')
+    settings.BLOG_IMAGE_GC_DELAY = 60
+    # Тот же файл загружен снова, пост с ним ещё не зафиксирован.
+    assert post_image_storage.save('post_images/image.png',
+                                   make_upload('red')) == name
+    assert not delete_unused_image(name), (
+        'Убедитесь, что недавно загруженный файл не удаляется, пока '
+        'ссылка на него может быть не зафиксирована.'
+    )
+    settings.BLOG_IMAGE_GC_DELAY = 0
+    assert delete_unused_image(name)
+    assert post_image_storage.save('post_images/image.png',
+                                   make_upload('red')) == name
+    assert post_image_storage.exists(name), (
+        'Убедитесь, что удалённый файл сохраняется заново.'
+    )
+
+
+@pytest.mark.django_db
+def test_dedupe_post_images_merges_legacy_copies(media_root, mixer, user):
+    directory = media_root / 'post_images'
+    directory.mkdir()
+    content = make_upload('green').read()
+    for name in ('image.png', 'image_AbC123.png'):
+        (directory / name).write_bytes(content)
+        Post.objects.create(author=user, pub_date='2020-01-01T00:00Z',
+                            image=f'post_images/{name}')
+    (directory / 'orphan.png').write_bytes(content)
+    stamped = Post.objects.values_list('updated_at', flat=True).first()
+    generation = get_generation(POST_CARD_GENERATION)
+    call_command('dedupe_post_images', delete_unreferenced=True)
+    assert get_generation(POST_CARD_GENERATION) != generation and all(
+        updated > stamped
+        for updated in Post.objects.values_list('updated_at', flat=True)
+    ), (
+        'Убедитесь, что `dedupe_post_images` сбрасывает кеши со ссылками '
+        'на старые файлы.'
+    )
+    names = set(Post.objects.values_list('image', flat=True))
+    assert len(names) == 1 and [
+        path.name for path in directory.iterdir()
+    ] == [names.pop().split('/')[-1]], (
+        'Убедитесь, что команда `dedupe_post_images` оставляет одну копию '
+        'одинаковых изображений и обновляет ссылки постов.'
+    )
@@ -0,0 +1,105 @@
+import hashlib
+from http import HTTPStatus
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from blog.forms import PostForm
+from blog.models import Post
+
+
+def make_image(size, image_format='PNG', **options) -> bytes:
+    buffer = BytesIO()
+    Image.new('RGB', size, 'navy').save(buffer, format=image_format,
+                                        **options)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def form_data(published_category, published_location):
+    return {
+        'title': 'Заголовок',
+        'text': 'Текст',
+        'pub_date': '2020-01-01',
+        'category': published_category.id,
+        'location': published_location.id,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    ('limits', 'error_code'),
+    [
+        ({'BLOG_IMAGE_MAX_BYTES': 100}, 'too_large'),
+        ({'BLOG_IMAGE_MAX_PIXELS': 64 * 64 - 1}, 'too_many_pixels'),
+        ({}, None),
+    ],
+    ids=['bytes', 'pixels', 'ok'],
+)
+def test_post_form_image_limits(limits, error_code, settings, form_data):
+    for name, value in limits.items():
+        setattr(settings, name, value)
+    upload = SimpleUploadedFile('big.png', make_image((64, 64)),
+                                content_type='image/png')
+    form = PostForm(data=form_data, files={'image': upload})
+    form.is_valid()
+    codes = [error.code for error in form.errors.as_data().get('image', [])]
+    assert codes == ([error_code] if error_code else []), (
+        'Убедитесь, что форма поста ограничивает размер файла и число '
+        'пикселей загружаемого изображения.'
+    )
+
+
+@pytest.mark.django_db
+def test_metadata_is_stripped_before_storing(settings, tmp_path, form_data,
+                                             user):
+    settings.MEDIA_ROOT = tmp_path
+    exif = Image.Exif()
+    exif[0x0112] = 6  # поворот на 90 градусов
+    exif[0x010F] = 'Camera'
+    upload = SimpleUploadedFile(
+        'photo.jpg', make_image((40, 20), 'JPEG', exif=exif.tobytes()),
+        content_type='image/jpeg',
+    )
+    form = PostForm(data=form_data, files={'image': upload})
+    assert form.is_valid(), form.errors
+    form.instance.author = user
+    post = form.save()
+    path = tmp_path / post.image.name
+    with Image.open(path) as image:
+        assert image.size == (20, 40) and not image.info.get('exif'), (
+            'Убедитесь, что из изображения удаляются метаданные EXIF, '
+            'а поворот применяется к пикселям.'
+        )
+    assert path.stem == hashlib.sha256(path.read_bytes()).hexdigest(), (
+        'Убедитесь, что метаданные удаляются до сохранения и имя файла '
+        'совпадает с хешем сохранённого содержимого.'
+    )
+
+
+@pytest.mark.django_db
+def test_oversized_upload_is_cut_short(settings, user_client, form_data):
+    settings.BLOG_IMAGE_MAX_BYTES = 1000
+    settings.DATA_UPLOAD_MAX_MEMORY_SIZE = 10_000
+    upload = SimpleUploadedFile('big.png', b'x' * 5000,
+                                content_type='image/png')
+    response = user_client.post('/posts/create/',
+                                {**form_data, 'image': upload})
+    assert response.status_code == HTTPStatus.OK
+    codes = [error.code for error in response.context['form'].errors
+             .as_data().get('image', [])]
+    assert codes == ['too_large'], (
+        'Убедитесь, что прерванная загрузка слишком большого файла '
+        'отклоняется формой с сообщением о размере.'
+    )
+    upload = SimpleUploadedFile('huge.png', b'x' * 20_000,
+                                content_type='image/png')
+    response = user_client.post('/posts/create/',
+                                {**form_data, 'image': upload})
+    assert response.status_code == HTTPStatus.BAD_REQUEST, (
+        'Убедитесь, что запрос, длина которого заведомо больше предела, '
+        'отклоняется без чтения тела.'
+    )
+    assert not Post.objects.exists()